@@ -0,0 +1,208 @@
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict, dataclass
+from json import dump, loads
+from os import environ, pathsep, wait4, waitstatus_to_exitcode
+from pathlib import Path
+from platform import python_version
+from shlex import quote
+from stat import S_IRWXU
+from subprocess import DEVNULL, PIPE, Popen, run
+from sys import executable, stdout
+from tempfile import TemporaryDirectory
+from time import perf_counter, time_ns
+from typing import Any, Callable, Mapping, NoReturn, Optional, Sequence
+
+from ...run import run_main
+from ..stats import summary
+from . import fzf
+from .fzf import OUT_ENV, PREVIEWS_ENV, T0_ENV
+from .repo import WORDS, Repo, Spec, synthesise
+
+_PACKAGE = Path(__file__).resolve(strict=True).parent.parent.parent
+_TERM = {
+    "COLUMNS": "120",
+    "LINES": "40",
+    "FZF_PREVIEW_COLUMNS": "84",
+    "FZF_PREVIEW_LINES": "40",
+}
+
+
+@dataclass(frozen=True)
+class _Tool:
+    name: str
+    module: str
+    args: Callable[[Repo], Sequence[str]]
+
+
+@dataclass(frozen=True)
+class _Run:
+    millis: float
+    code: int
+    max_rss_kib: int
+
+
+_TOOLS = (
+    _Tool("git-ls-c", "py_dev.git.ls_commits.__main__", lambda _: ()),
+    _Tool("git-diff-f", "py_dev.git.diff_file.__main__", lambda r: (str(r.hot),)),
+    _Tool("git-show-c", "py_dev.git.show_commit.__main__", lambda _: ("HEAD",)),
+    _Tool(
+        "git-diff-c",
+        "py_dev.git.diff_commits.__main__",
+        lambda r: (f"HEAD~{min(r.commits - 1, 100)}",),
+    ),
+    _Tool("git-ls-r", "py_dev.git.ls_reflog.__main__", lambda _: ()),
+    _Tool("git-rg-c", "py_dev.git.rg_commits.__main__", lambda _: (WORDS[0],)),
+    _Tool("git-rg-s", "py_dev.git.rg_strings.__main__", lambda _: (WORDS[1],)),
+    _Tool("git-ls-b", "py_dev.git.ls_blame.__main__", lambda _: ()),
+    _Tool("git-ls-d", "py_dev.git.ls_dead.__main__", lambda _: ()),
+)
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("-c", "--commits", type=int, default=1000)
+    parser.add_argument("-f", "--files", type=int, default=200)
+    parser.add_argument("-b", "--blob-size", type=int, default=2**12)
+    parser.add_argument("-s", "--submodules", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-p", "--previews", type=int, default=10)
+    parser.add_argument("-o", "--output", type=Path)
+    parser.add_argument(
+        "-t",
+        "--tool",
+        dest="tools",
+        action="append",
+        choices=tuple(tool.name for tool in _TOOLS),
+        default=[],
+    )
+    return parser.parse_args()
+
+
+def _revision() -> Optional[str]:
+    proc = run(
+        ("git", "rev-parse", "HEAD"),
+        cwd=_PACKAGE,
+        stdout=PIPE,
+        stderr=DEVNULL,
+        text=True,
+    )
+    return proc.stdout.strip() if not proc.returncode else None
+
+
+def _script(path: Path, text: str) -> Path:
+    path.write_text(text)
+    path.chmod(S_IRWXU)
+    return path
+
+
+def _bin(root: Path, tool: _Tool) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    py, fake = quote(executable), quote(str(Path(fzf.__file__).resolve()))
+    _script(root / "fzf", text=f'#!/bin/sh\nexec {py} -I -S {fake} "$@"\n')
+    return _script(
+        root / tool.name,
+        text=f"#!{executable}\nfrom {tool.module} import main\nmain()\n",
+    )
+
+
+def _run(argv: Sequence[str], cwd: Path, env: Mapping[str, str]) -> _Run:
+    started = perf_counter()
+    proc = Popen(argv, cwd=cwd, env=env, stdin=DEVNULL, stdout=DEVNULL)
+    _, status, usage = wait4(proc.pid, 0)
+    millis = (perf_counter() - started) * 1000
+    proc.returncode = code = waitstatus_to_exitcode(status)
+    return _Run(millis=millis, code=code, max_rss_kib=usage.ru_maxrss)
+
+
+def _bench(
+    tool: _Tool, repo: Repo, tmp: Path, repeat: int, previews: int
+) -> Mapping[str, Any]:
+    script = _bin(tmp / "bin", tool=tool)
+    out = tmp / f"{tool.name}.json"
+    python_path = pathsep.join(
+        p for p in (str(_PACKAGE.parent), environ.get("PYTHONPATH")) if p
+    )
+    env = {
+        **environ,
+        **_TERM,
+        "PATH": pathsep.join((str(script.parent), environ.get("PATH", ""))),
+        "PYTHONPATH": python_path,
+        "XDG_CACHE_HOME": str(tmp / "cache" / tool.name),
+        OUT_ENV: str(out),
+        PREVIEWS_ENV: str(previews),
+    }
+
+    cold = [
+        _run((str(script), "--help"), cwd=repo.root, env=env).millis
+        for _ in range(max(1, repeat))
+    ]
+
+    argv = (str(script), *tool.args(repo))
+    normal = _run(argv, cwd=repo.root, env={**env, T0_ENV: str(time_ns())})
+    record = loads(out.read_text()) if out.exists() else {}
+    latencies = record.get("previews_ms", ())
+
+    return {
+        "argv": [tool.name, *argv[1:]],
+        "exit_code": normal.code,
+        "cold_start_ms": summary(cold),
+        "first_line_ms": record.get("first_line_ms"),
+        "last_line_ms": record.get("last_line_ms"),
+        "lines": record.get("lines"),
+        "preview_ms": summary(latencies),
+        "previews_ms": latencies,
+        "total_ms": normal.millis,
+        "max_rss_kib": normal.max_rss_kib,
+    }
+
+
+async def _main() -> int:
+    args = _parse_args()
+    spec = Spec(
+        commits=max(2, args.commits),
+        files=max(1, args.files),
+        blob_size=args.blob_size,
+        submodules=args.submodules,
+        seed=args.seed,
+    )
+    tools = tuple(t for t in _TOOLS if not args.tools or t.name in args.tools)
+
+    with TemporaryDirectory() as tmp:
+        started = perf_counter()
+        repo = synthesise(Path(tmp) / "repo", spec=spec)
+        synthesised = (perf_counter() - started) * 1000
+
+        results = {
+            tool.name: _bench(
+                tool,
+                repo=repo,
+                tmp=Path(tmp),
+                repeat=args.repeat,
+                previews=args.previews,
+            )
+            for tool in tools
+        }
+
+    report = {
+        "revision": _revision(),
+        "python": python_version(),
+        "repo": {**asdict(spec), "synthesis_ms": synthesised},
+        "tools": results,
+    }
+    if args.output:
+        with args.output.open("w") as fp:
+            dump(report, fp, indent=2)
+    else:
+        dump(report, stdout, indent=2)
+        stdout.write("\n")
+
+    return 0 if all(r["exit_code"] == 0 for r in results.values()) else 1
+
+
+def main() -> NoReturn:
+    run_main(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from json import dump
+from os import environ, read
+from re import compile
+from subprocess import DEVNULL, run
+from sys import argv, exit, stdin
+from tempfile import NamedTemporaryFile
+from time import time_ns
+from typing import Optional, Sequence
+
+OUT_ENV = "__PY_DEV_BENCH_OUT__"
+T0_ENV = "__PY_DEV_BENCH_T0__"
+PREVIEWS_ENV = "__PY_DEV_BENCH_PREVIEWS__"
+
+_ANSI = compile(rb"\x1b\[[0-9;]*m")
+_PREVIEW = "--preview="
+_CHUNK = 2**16
+
+
+def _preview_cmd(args: Sequence[str]) -> Optional[str]:
+    for arg in args:
+        if arg.startswith(_PREVIEW):
+            return arg[len(_PREVIEW) :]
+    return None
+
+
+def _preview(cmd: str, idx: int, entry: bytes) -> float:
+    with NamedTemporaryFile() as fp:
+        fp.write(_ANSI.sub(b"", entry) + b"\0")
+        fp.flush()
+        line = cmd.replace("{+f}", fp.name).replace("{n}", str(idx))
+        sh = environ["SHELL"]
+        started = time_ns()
+        run((sh, "-c", line), stdin=DEVNULL, stdout=DEVNULL, check=True)
+        return (time_ns() - started) / 1e6
+
+
+def main() -> None:
+    t0 = int(environ[T0_ENV])
+    previews = int(environ.get(PREVIEWS_ENV, "0"))
+    first: Optional[int] = None
+    buf = bytearray()
+
+    while chunk := read(stdin.fileno(), _CHUNK):
+        if first is None and b"\0" in chunk:
+            first = time_ns()
+        buf += chunk
+    last = time_ns()
+    if first is None and buf:
+        first = last
+
+    entries = bytes(buf).rstrip(b"\0").split(b"\0") if buf else []
+    cmd = _preview_cmd(argv[1:])
+    latencies = (
+        [
+            _preview(cmd, idx=idx, entry=entry)
+            for idx, entry in enumerate(entries[:previews])
+        ]
+        if cmd
+        else []
+    )
+
+    record = {
+        "first_line_ms": (first - t0) / 1e6 if first is not None else None,
+        "last_line_ms": (last - t0) / 1e6,
+        "lines": len(entries),
+        "previews_ms": latencies,
+    }
+    with open(environ[OUT_ENV], "w") as fp:
+        dump(record, fp)
+
+    exit(130)
+
+
+if __name__ == "__main__":
+    main()
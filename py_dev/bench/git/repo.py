@@ -0,0 +1,162 @@
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from random import Random
+from subprocess import PIPE, Popen, check_call, check_output
+from typing import IO, Callable, MutableMapping, Sequence
+
+WORDS = (
+    "alpha",
+    "bravo",
+    "charlie",
+    "delta",
+    "echo",
+    "foxtrot",
+    "golf",
+    "hotel",
+    "india",
+    "juliet",
+    "kilo",
+    "lima",
+    "mike",
+    "november",
+    "oscar",
+    "papa",
+)
+
+_COMMITTER = "Bench <bench@example.com>"
+_EPOCH = 1_600_000_000
+_BRANCH = "refs/heads/main"
+
+
+@dataclass(frozen=True)
+class Spec:
+    commits: int
+    files: int
+    blob_size: int
+    submodules: int
+    seed: int
+
+
+@dataclass(frozen=True)
+class Repo:
+    root: Path
+    hot: PurePosixPath
+    commits: int
+
+
+def _git(cwd: Path, *args: str) -> None:
+    check_call(("git", *args), cwd=cwd, stdout=PIPE)
+
+
+def _line(rng: Random) -> bytes:
+    return " ".join(rng.choices(WORDS, k=8)).encode() + b"\n"
+
+
+def _blob(rng: Random, size: int) -> list[bytes]:
+    return [_line(rng) for _ in range(max(1, size // 60))]
+
+
+def _data(fp: IO[bytes], data: bytes) -> None:
+    fp.write(b"data %d\n" % len(data))
+    fp.write(data)
+    fp.write(b"\n")
+
+
+def _commit(fp: IO[bytes], idx: int, message: str) -> None:
+    fp.write(f"commit {_BRANCH}\nmark :{idx + 1}\n".encode())
+    fp.write(f"committer {_COMMITTER} {_EPOCH + idx * 60} +0000\n".encode())
+    _data(fp, message.encode())
+    if idx:
+        fp.write(f"from :{idx}\n".encode())
+
+
+def _modify(fp: IO[bytes], path: PurePosixPath, lines: Sequence[bytes]) -> None:
+    fp.write(f"M 100644 inline {path}\n".encode())
+    _data(fp, b"".join(lines))
+
+
+def _path(idx: int) -> PurePosixPath:
+    return PurePosixPath(f"dir{idx % 32:02}") / f"file{idx:06}.txt"
+
+
+def _fast_import(root: Path, write: Callable[[IO[bytes]], None]) -> None:
+    proc = Popen(("git", "fast-import", "--quiet"), cwd=root, stdin=PIPE)
+    assert proc.stdin
+    with proc.stdin as fp:
+        write(fp)
+    if code := proc.wait():
+        raise OSError(f"git fast-import exited with {code}")
+    _git(root, "symbolic-ref", "HEAD", _BRANCH)
+    _git(root, "reset", "--hard", "--quiet")
+
+
+def _submodule(root: Path) -> str:
+    root.mkdir(parents=True)
+    _git(root, "init", "--quiet")
+
+    def write(fp: IO[bytes]) -> None:
+        _commit(fp, idx=0, message="init\n")
+        _modify(fp, PurePosixPath("README"), lines=(b"submodule\n",))
+
+    _fast_import(root, write=write)
+    return check_output(("git", "rev-parse", "HEAD"), cwd=root, text=True).strip()
+
+
+def synthesise(root: Path, spec: Spec) -> Repo:
+    rng = Random(spec.seed)
+    root.mkdir(parents=True)
+    _git(root, "init", "--quiet")
+
+    subs = {
+        f"sub{i}": _submodule(root.parent / f"{root.name}-sub{i}")
+        for i in range(spec.submodules)
+    }
+    blobs: MutableMapping[PurePosixPath, list[bytes]] = {}
+    touched: Counter[PurePosixPath] = Counter()
+
+    def write(fp: IO[bytes]) -> None:
+        next_file = 0
+        for idx in range(spec.commits):
+            message = f"change {idx}: {' '.join(rng.choices(WORDS, k=4))}\n"
+            _commit(fp, idx=idx, message=message)
+
+            if not idx:
+                for name, sha in subs.items():
+                    fp.write(f"M 160000 {sha} {name}\n".encode())
+                if subs:
+                    gitmodules = b"".join(
+                        f'[submodule "{name}"]\n\tpath = {name}\n'
+                        f"\turl = ../{root.name}-{name}\n".encode()
+                        for name in subs
+                    )
+                    _modify(fp, PurePosixPath(".gitmodules"), lines=(gitmodules,))
+                changed = [_path(i) for i in range(spec.files)]
+                next_file = spec.files
+                for path in changed:
+                    blobs[path] = _blob(rng, size=spec.blob_size)
+            else:
+                live = sorted(blobs)
+                changed = rng.sample(live, k=min(len(live), rng.randint(1, 3)))
+                for path in changed:
+                    lines = blobs[path]
+                    for _ in range(rng.randint(1, 4)):
+                        lines[rng.randrange(len(lines))] = _line(rng)
+
+                if live and rng.random() < 0.1:
+                    dead = rng.choice(live)
+                    fp.write(f"D {dead}\n".encode())
+                    blobs.pop(dead)
+                    changed = [path for path in changed if path != dead]
+                    born = _path(next_file)
+                    next_file += 1
+                    blobs[born] = _blob(rng, size=spec.blob_size)
+                    changed.append(born)
+
+            for path in changed:
+                touched[path] += 1
+                _modify(fp, path, lines=blobs[path])
+
+    _fast_import(root, write=write)
+    hot = max(sorted(blobs), key=lambda path: touched[path])
+    return Repo(root=root, hot=hot, commits=spec.commits)
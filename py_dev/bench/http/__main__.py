@@ -0,0 +1,221 @@
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
+from json import dump
+from os import devnull, urandom
+from pathlib import Path
+from platform import python_version
+from random import Random
+from sys import stderr, stdout
+from tempfile import TemporaryDirectory
+from threading import Thread
+from typing import Any, Callable, Mapping, NoReturn, Sequence
+
+from ...run import run_main
+from ...srv.serve import WORKERS, serve
+from ...stdio import redirected
+from ..stats import summary
+from .load import Request, Tally, load, warm_up
+
+_HOST = "::1"
+_CHUNK = 2**20
+_SLICE = 2**16
+_WORDS = (b"NAME", b"SYNOPSIS", b"DESCRIPTION", b"OPTIONS", b"<b>", b"</b>", b"-v")
+
+
+@dataclass(frozen=True)
+class _Fixture:
+    small: int
+    huge: int
+    listing: int
+
+
+@dataclass(frozen=True)
+class _Scenario:
+    name: str
+    keep_alive: bool
+    requests: Callable[[_Fixture], Callable[[Random], Request]]
+
+
+def _small(fixture: _Fixture) -> Callable[[Random], Request]:
+    return lambda rng: Request(f"/small/{rng.randrange(fixture.small):06}.txt")
+
+
+def _ranges(fixture: _Fixture) -> Callable[[Random], Request]:
+    def request(rng: Random) -> Request:
+        start = rng.randrange(max(1, fixture.huge - _SLICE))
+        stop = min(fixture.huge, start + _SLICE) - 1
+        return Request("/huge.bin", headers={"Range": f"bytes={start}-{stop}"})
+
+    return request
+
+
+_SCENARIOS = (
+    _Scenario("small-files", keep_alive=True, requests=_small),
+    _Scenario("small-files-close", keep_alive=False, requests=_small),
+    _Scenario(
+        "huge-file", keep_alive=True, requests=lambda _: lambda _: Request("/huge.bin")
+    ),
+    _Scenario("ranges", keep_alive=True, requests=_ranges),
+    _Scenario(
+        "listing", keep_alive=True, requests=lambda _: lambda _: Request("/listing/")
+    ),
+    _Scenario(
+        "man-gzip",
+        keep_alive=True,
+        requests=lambda _: lambda _: Request(
+            "/man.html", headers={"Accept-Encoding": "gzip"}
+        ),
+    ),
+)
+
+
+def _parse_args() -> Namespace:
+    names = tuple(scenario.name for scenario in _SCENARIOS)
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--scenario", action="append", choices=names, default=[])
+    parser.add_argument("-d", "--duration", type=float, default=5)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--small-files", type=int, default=2000)
+    parser.add_argument("--huge-size", type=int, default=2**26)
+    parser.add_argument("--listing-size", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    return parser.parse_args()
+
+
+def _populate(root: Path, fixture: _Fixture, seed: int) -> None:
+    rng = Random(seed)
+
+    small = root / "small"
+    small.mkdir()
+    for idx in range(fixture.small):
+        (small / f"{idx:06}.txt").write_bytes(rng.randbytes(rng.randint(2**8, 2**12)))
+
+    with (root / "huge.bin").open("wb") as fp:
+        for offset in range(0, fixture.huge, _CHUNK):
+            fp.write(urandom(min(_CHUNK, fixture.huge - offset)))
+
+    listing = root / "listing"
+    listing.mkdir()
+    for idx in range(fixture.listing):
+        (listing / f"entry-{idx:06}").touch()
+
+    page = b" ".join(rng.choices(_WORDS, k=2**16))
+    html = b"<html><body><pre>" + page + b"</pre></body></html>"
+    (root / "man.html").write_bytes(html)
+
+
+def _report(scenario: _Scenario, tally: Tally, elapsed: float) -> Mapping[str, Any]:
+    requests = len(tally.latencies)
+    return {
+        "keep_alive": scenario.keep_alive,
+        "requests": requests,
+        "errors": tally.errors,
+        "statuses": {str(k): v for k, v in sorted(tally.statuses.items())},
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed if elapsed else 0,
+        "mb_per_second": tally.received / elapsed / 1e6 if elapsed else 0,
+        "latency_ms": {
+            k: v * 1000 if v is not None else None
+            for k, v in summary(tally.latencies).items()
+        },
+    }
+
+
+def _table(results: Mapping[str, Mapping[str, Any]]) -> Sequence[str]:
+    header = f"{'scenario':<20} {'req/s':>10} {'MB/s':>10} {'p50':>8} {'p99':>8} err"
+    lines = [header]
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        p50, p99 = (latency[k] or 0 for k in ("p50", "p99"))
+        lines.append(
+            f"{name:<20} {result['requests_per_second']:>10.1f} "
+            f"{result['mb_per_second']:>10.1f} {p50:>8.2f} {p99:>8.2f} "
+            f"{result['errors']}"
+        )
+    return lines
+
+
+async def _main() -> int:
+    args = _parse_args()
+    fixture = _Fixture(
+        small=max(1, args.small_files),
+        huge=max(1, args.huge_size),
+        listing=max(0, args.listing_size),
+    )
+    scenarios = tuple(
+        s for s in _SCENARIOS if not args.scenario or s.name in args.scenario
+    )
+    results = {}
+
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _populate(root, fixture=fixture, seed=args.seed)
+
+        httpd = serve(
+            root,
+            port=0,
+            promiscuous=False,
+            workers=args.workers,
+            access_log=None,
+            metrics=False,
+        )
+        if not httpd:
+            return 1
+
+        server = Thread(target=httpd.serve_forever, daemon=True)
+        server.start()
+        with open(devnull, "wb") as null:
+            try:
+                for scenario in scenarios:
+                    requests = scenario.requests(fixture)
+                    with redirected({stderr.fileno(): null.fileno()}):
+                        warm_up(
+                            _HOST,
+                            port=httpd.server_port,
+                            request=requests(Random(args.seed)),
+                        )
+                        tally, elapsed = load(
+                            _HOST,
+                            port=httpd.server_port,
+                            keep_alive=scenario.keep_alive,
+                            requests=requests,
+                            concurrency=args.concurrency,
+                            duration=args.duration,
+                            seed=args.seed,
+                        )
+                    results[scenario.name] = _report(
+                        scenario, tally=tally, elapsed=elapsed
+                    )
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+    if args.json:
+        report = {
+            "python": python_version(),
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "fixture": {
+                "small_files": fixture.small,
+                "huge_size": fixture.huge,
+                "listing_size": fixture.listing,
+            },
+            "scenarios": results,
+        }
+        dump(report, stdout, indent=2)
+        stdout.write("\n")
+    else:
+        stdout.writelines(f"{line}\n" for line in _table(results))
+
+    failed = any(result["errors"] for result in results.values())
+    return 1 if failed else 0
+
+
+def main() -> NoReturn:
+    run_main(_main())
+
+
+if __name__ == "__main__":
+    main()
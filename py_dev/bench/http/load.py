@@ -0,0 +1,123 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from http.client import HTTPConnection, HTTPException
+from random import Random
+from threading import Thread
+from time import perf_counter
+from typing import Callable, Mapping, Optional, Sequence
+
+_BUF_SIZE = 2**16
+_TIMEOUT = 30
+
+
+@dataclass(frozen=True)
+class Request:
+    path: str
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Tally:
+    latencies: list[float] = field(default_factory=list)
+    received: int = 0
+    errors: int = 0
+    statuses: Counter[int] = field(default_factory=Counter)
+
+    def merge(self, other: "Tally") -> None:
+        self.latencies.extend(other.latencies)
+        self.received += other.received
+        self.errors += other.errors
+        self.statuses.update(other.statuses)
+
+
+def _drain(conn: HTTPConnection, request: Request, keep_alive: bool) -> tuple[int, int]:
+    headers = {**request.headers, **({} if keep_alive else {"Connection": "close"})}
+    conn.request("GET", request.path, headers=headers)
+    resp = conn.getresponse()
+
+    buf = memoryview(bytearray(_BUF_SIZE))
+    received = 0
+    while n := resp.readinto(buf):
+        received += n
+
+    if not keep_alive or resp.will_close:
+        conn.close()
+    return resp.status, received
+
+
+def _client(
+    host: str,
+    port: int,
+    keep_alive: bool,
+    requests: Callable[[Random], Request],
+    deadline: float,
+    seed: int,
+    tally: Tally,
+) -> None:
+    rng = Random(seed)
+    conn = HTTPConnection(host, port, timeout=_TIMEOUT)
+    try:
+        while perf_counter() < deadline:
+            request = requests(rng)
+            started = perf_counter()
+            try:
+                status, received = _drain(conn, request=request, keep_alive=keep_alive)
+            except (OSError, HTTPException):
+                conn.close()
+                tally.errors += 1
+            else:
+                tally.latencies.append(perf_counter() - started)
+                tally.received += received
+                tally.statuses[status] += 1
+    finally:
+        conn.close()
+
+
+def warm_up(host: str, port: int, request: Request) -> None:
+    conn = HTTPConnection(host, port, timeout=_TIMEOUT)
+    try:
+        _drain(conn, request=request, keep_alive=False)
+    finally:
+        conn.close()
+
+
+def load(
+    host: str,
+    port: int,
+    keep_alive: bool,
+    requests: Callable[[Random], Request],
+    concurrency: int,
+    duration: float,
+    seed: Optional[int] = None,
+) -> tuple[Tally, float]:
+    base = Random(seed).randrange(2**32)
+    deadline = perf_counter() + duration
+    tallies: Sequence[Tally] = tuple(Tally() for _ in range(max(1, concurrency)))
+    threads = tuple(
+        Thread(
+            target=_client,
+            kwargs={
+                "host": host,
+                "port": port,
+                "keep_alive": keep_alive,
+                "requests": requests,
+                "deadline": deadline,
+                "seed": base + idx,
+                "tally": tally,
+            },
+            daemon=True,
+        )
+        for idx, tally in enumerate(tallies)
+    )
+
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - started
+
+    total = Tally()
+    for tally in tallies:
+        total.merge(tally)
+    return total, elapsed
@@ -0,0 +1,107 @@
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
+from pathlib import Path
+from re import compile
+from sys import executable, stdout
+from typing import AbstractSet, Iterator, NoReturn, Sequence
+
+from std2.asyncio.subprocess import call
+from std2.pathlib import is_relative_to
+
+from ...run import run_main
+
+_PACKAGE = Path(__file__).resolve(strict=True).parent.parent.parent
+_BENCH = _PACKAGE / "bench"
+
+_IMPORT_TIME = compile(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)\s*")
+
+_HEAVY = frozenset(("pygments", "jinja2"))
+_SERVERS = {
+    "py_dev.git.web.__main__": frozenset(("jinja2",)),
+    "py_dev.man.__main__": frozenset(("jinja2",)),
+    "py_dev.srv.__main__": frozenset(("jinja2",)),
+}
+
+
+@dataclass(frozen=True)
+class _Sample:
+    module: str
+    micros: int
+    imported: AbstractSet[str]
+
+
+def _parse_args() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-b", "--budget", type=float, default=150)
+    parser.add_argument("-s", "--server-budget", type=float, default=200)
+    parser.add_argument("modules", nargs="*")
+    return parser.parse_args()
+
+
+def _entry_points() -> Iterator[str]:
+    for path in sorted(_PACKAGE.rglob("__main__.py")):
+        if not is_relative_to(path, _BENCH):
+            rel = path.relative_to(_PACKAGE.parent).with_suffix("")
+            yield ".".join(rel.parts)
+
+
+async def _sample(module: str) -> _Sample:
+    proc = await call(
+        executable,
+        "-X",
+        "importtime",
+        "-c",
+        f"import {module}",
+        cwd=_PACKAGE.parent,
+        capture_stdout=False,
+    )
+
+    micros, imported = 0, set()
+    for line in proc.stderr.decode().splitlines():
+        if match := _IMPORT_TIME.fullmatch(line):
+            cumulative, name = match.groups()
+            top, _, _ = name.partition(".")
+            imported.add(top)
+            if name == module:
+                micros = int(cumulative)
+
+    return _Sample(module=module, micros=micros, imported=imported)
+
+
+async def _measure(module: str, repeat: int) -> _Sample:
+    samples = [await _sample(module) for _ in range(max(1, repeat))]
+    return min(samples, key=lambda s: s.micros)
+
+
+def _report(sample: _Sample, budget: float, allowed: AbstractSet[str]) -> bool:
+    millis = sample.micros / 1000
+    heavy = sorted((sample.imported & _HEAVY) - allowed)
+    ok = millis <= budget and not heavy
+    status = "ok" if ok else "FAIL"
+    extra = f" imports {', '.join(heavy)}" if heavy else ""
+    line = f"{status:<4} {millis:8.1f}ms / {budget:g}ms {sample.module}{extra}"
+    stdout.write(line + "\n")
+    return ok
+
+
+async def _main() -> int:
+    args = _parse_args()
+    modules: Sequence[str] = args.modules or tuple(_entry_points())
+
+    ok = True
+    for module in modules:
+        sample = await _measure(module, repeat=args.repeat)
+        budget = args.server_budget if module in _SERVERS else args.budget
+        allowed = _SERVERS.get(module, frozenset())
+        ok &= _report(sample, budget=budget, allowed=allowed)
+
+    return 0 if ok else 1
+
+
+def main() -> NoReturn:
+    run_main(_main())
+
+
+if __name__ == "__main__":
+    main()
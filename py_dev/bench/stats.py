@@ -0,0 +1,15 @@
+from typing import Mapping, Optional, Sequence
+
+_QUANTILES = {"min": 0.0, "p50": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99, "max": 1.0}
+
+
+def summary(samples: Sequence[float]) -> Mapping[str, Optional[float]]:
+    ordered = sorted(samples)
+
+    def q(p: float) -> Optional[float]:
+        if not ordered:
+            return None
+        else:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {name: q(p) for name, p in _QUANTILES.items()}
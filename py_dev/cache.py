@@ -0,0 +1,116 @@
+from contextlib import suppress
+from dataclasses import dataclass, field
+from hashlib import sha256
+from os import environ, getpid, scandir, utime
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, Callable, Optional, Sequence
+from uuid import uuid4
+
+
+def cache_dir(*parts: str) -> Path:
+    if xdg := environ.get("XDG_CACHE_HOME"):
+        return Path(xdg).joinpath("py-dev", *parts)
+    else:
+        return Path.home().joinpath(".cache", "py-dev", *parts)
+
+
+_RESCAN = 256
+_SLACK = 8
+
+
+@dataclass
+class _Usage:
+    lock: Lock = field(default_factory=Lock)
+    total: Optional[int] = None
+    stores: int = 0
+
+
+@dataclass(frozen=True)
+class DiskCache:
+    root: Path
+    max_bytes: int
+    _usage: _Usage = field(
+        default_factory=_Usage, init=False, repr=False, compare=False
+    )
+
+    def _path(self, key: Sequence[str]) -> Path:
+        digest = sha256("\0".join(key).encode()).hexdigest()
+        return self.root / digest
+
+    def lookup(self, key: Sequence[str]) -> Optional[Path]:
+        path = self._path(key)
+        try:
+            utime(path)
+        except OSError:
+            return None
+        else:
+            return path
+
+    def get(self, key: Sequence[str]) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        else:
+            with suppress(OSError):
+                utime(path)
+            return data
+
+    def store(
+        self, key: Sequence[str], write: Callable[[BinaryIO], None]
+    ) -> Optional[Path]:
+        path = self._path(key)
+        tmp = self.root / f".{getpid()}-{uuid4().hex}"
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with tmp.open("wb") as fp:
+                write(fp)
+                size = fp.tell()
+            with suppress(OSError):
+                size -= path.stat().st_size
+            tmp.replace(path)
+        except OSError:
+            with suppress(OSError):
+                tmp.unlink()
+            return None
+        else:
+            self._account(size)
+            return path
+
+    def put(self, key: Sequence[str], data: bytes) -> None:
+        def write(fp: BinaryIO) -> None:
+            fp.write(data)
+
+        self.store(key, write=write)
+
+    def _account(self, delta: int) -> None:
+        usage = self._usage
+        with usage.lock:
+            usage.stores += 1
+            if usage.total is not None and usage.stores % _RESCAN:
+                usage.total += delta
+                if usage.total <= self.max_bytes:
+                    return
+            usage.total = self._evict()
+
+    def _evict(self) -> int:
+        total = 0
+        with suppress(OSError):
+            entries = []
+            for entry in scandir(self.root):
+                with suppress(OSError):
+                    stat = entry.stat(follow_symlinks=False)
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            low = self.max_bytes - self.max_bytes // _SLACK
+            for _, size, path in sorted(entries):
+                if total <= low:
+                    break
+                else:
+                    with suppress(OSError):
+                        Path(path).unlink()
+                    total -= size
+        return total
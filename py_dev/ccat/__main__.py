@@ -3,36 +3,56 @@ from pathlib import Path, PurePath
 from sys import stdin, stdout
 from typing import NoReturn
 
-from pygments.formatters._mapping import FORMATTERS
-from pygments.styles import get_all_styles
-
 from ..run import run_main
 from .consts import DEFAULT_FORMATTER, DEFAULT_STYLE
 from .pprn import pprn
 
 
+def _validate(parser: ArgumentParser, args: Namespace) -> None:
+    from pygments.formatters import find_formatter_class
+    from pygments.formatters._mapping import FORMATTERS
+    from pygments.styles import get_all_styles, get_style_by_name
+    from pygments.util import ClassNotFound
+
+    if not find_formatter_class(args.formatter):
+        formatters = sorted(
+            name for _, _, names, *_ in FORMATTERS.values() for name in names
+        )
+        choices = ", ".join(map(repr, formatters))
+        parser.error(
+            f"argument -f/--formatter: invalid choice: {args.formatter!r} "
+            f"(choose from {choices})"
+        )
+
+    try:
+        get_style_by_name(args.theme)
+    except ClassNotFound:
+        choices = ", ".join(map(repr, sorted(get_all_styles())))
+        parser.error(
+            f"argument -t/--theme: invalid choice: {args.theme!r} "
+            f"(choose from {choices})"
+        )
+
+
 def _arg_parse() -> Namespace:
     parser = ArgumentParser()
     parser.add_argument("name", nargs="?", type=PurePath)
     parser.add_argument("-", "--stdin", action="store_true")
-
-    themes = sorted(get_all_styles())
-    parser.add_argument("-t", "--theme", choices=themes, default=DEFAULT_STYLE)
-
-    formatters = sorted(
-        name for _, _, names, *_ in FORMATTERS.values() for name in names
-    )
-    parser.add_argument(
-        "-f", "--formatter", choices=formatters, default=DEFAULT_FORMATTER
-    )
+    parser.add_argument("-t", "--theme", default=DEFAULT_STYLE)
+    parser.add_argument("-f", "--formatter", default=DEFAULT_FORMATTER)
 
     args = parser.parse_args()
+    _validate(parser, args=args)
     return args
 
 
 async def _main() -> int:
     args = _arg_parse()
-    text = stdin.read() if args.stdin or not args.name else Path(args.name).read_text()
+    text = (
+        stdin.buffer.read()
+        if args.stdin or not args.name
+        else Path(args.name).read_bytes()
+    )
     pretty = pprn(
         format=args.formatter, theme=args.theme, filename=args.name, text=text
     )
@@ -1,2 +1,4 @@
 DEFAULT_FORMATTER = "terminal16m"
 DEFAULT_STYLE = "friendly"
+
+HIGHLIGHTER_ENV = "PY_DEV_HIGHLIGHTER"
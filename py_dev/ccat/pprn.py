@@ -1,41 +1,69 @@
 from contextlib import suppress
+from functools import lru_cache
 from os.path import normcase
 from pathlib import PurePath
-from typing import Optional, cast, no_type_check
-
-from pygments import highlight
-from pygments.formatters import get_formatter_by_name
-from pygments.lexer import Lexer
-from pygments.lexers import get_lexer_for_filename, guess_lexer
-from pygments.lexers.special import TextLexer
-from pygments.styles import get_style_by_name
-from pygments.util import ClassNotFound
+from typing import TYPE_CHECKING, Optional, Union, cast, no_type_check
 
 from .consts import DEFAULT_FORMATTER, DEFAULT_STYLE
 
+if TYPE_CHECKING:
+    from pygments.formatter import Formatter
+    from pygments.lexer import Lexer
+
+_GUESS_SIZE = 2**12
+
+
+@lru_cache(maxsize=None)
+@no_type_check
+def _get_formatter(format: str, theme: str) -> "Formatter":
+    from pygments.formatters import get_formatter_by_name
+    from pygments.styles import get_style_by_name
+
+    style = get_style_by_name(theme)
+    return get_formatter_by_name(format, style=style)
+
 
+@lru_cache(maxsize=2**8)
 @no_type_check
-def _get_lexer(filename: Optional[PurePath], text: str) -> Lexer:
-    if filename:
-        with suppress(ClassNotFound):
-            return get_lexer_for_filename(normcase(filename.name))
+def _lexer_for_filename(name: str) -> Optional["Lexer"]:
+    from pygments.lexers import get_lexer_for_filename
+    from pygments.util import ClassNotFound
 
     with suppress(ClassNotFound):
-        return guess_lexer(text)
+        return get_lexer_for_filename(name)
+    return None
+
+
+@no_type_check
+def _get_lexer(filename: Optional[PurePath], text: str) -> "Lexer":
+    from pygments.lexers import guess_lexer
+    from pygments.lexers.special import TextLexer
+    from pygments.util import ClassNotFound
+
+    if filename and (lexer := _lexer_for_filename(normcase(filename.name))):
+        return lexer
+
+    with suppress(ClassNotFound):
+        return guess_lexer(text[:_GUESS_SIZE])
 
     return TextLexer()
 
 
-def pprn(format: str, theme: str, filename: Optional[PurePath], text: str) -> str:
-    style = get_style_by_name(theme)
-    formatter = get_formatter_by_name(format, style=style)
+def pprn(
+    format: str, theme: str, filename: Optional[PurePath], text: Union[str, bytes]
+) -> str:
+    from pygments import highlight
+
+    if isinstance(text, bytes):
+        text = text.decode(errors="replace")
 
+    formatter = _get_formatter(format, theme=theme)
     lexer = _get_lexer(filename, text)
     pretty = highlight(text, lexer=lexer, formatter=formatter)
     return cast(str, pretty)
 
 
-def pprn_basic(filename: Optional[PurePath], text: str) -> str:
+def pprn_basic(filename: Optional[PurePath], text: Union[str, bytes]) -> str:
     return pprn(
         format=DEFAULT_FORMATTER, theme=DEFAULT_STYLE, filename=filename, text=text
     )
@@ -0,0 +1,43 @@
+from os import environ, execl
+from socket import AF_UNIX, SOCK_STREAM, send_fds, socket
+from sys import argv, exit
+from typing import Iterator
+
+SOCK_ENV = "__PY_DEV_SOCK__"
+SH_ENV = "__PY_DEV_SH__"
+
+ENV_KEYS = {"COLUMNS", "LINES"}
+ENV_PREFIX = "FZF_"
+
+LEN_BYTES = 4
+
+
+def _env() -> Iterator[str]:
+    for key, val in environ.items():
+        if key in ENV_KEYS or key.startswith(ENV_PREFIX):
+            yield f"{key}={val}"
+
+
+def main() -> None:
+    _, flag, cmd = argv
+    assert flag == "-c", argv
+
+    payload = "\0".join((cmd, *_env())).encode()
+    msg = len(payload).to_bytes(LEN_BYTES, byteorder="big") + payload
+
+    sock = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        sock.connect(environ[SOCK_ENV])
+    except (KeyError, OSError):
+        sock.close()
+        sh = environ[SH_ENV]
+        execl(sh, sh, flag, cmd)
+    else:
+        with sock:
+            send_fds(sock, (msg,), (0, 1, 2))
+            code = sock.recv(1)
+        exit(code[0] if code else 1)
+
+
+if __name__ == "__main__":
+    main()
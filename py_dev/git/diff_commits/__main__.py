@@ -82,7 +82,7 @@ async def _main() -> int:
 
     elif mode is Mode.normal:
         files = await _git_file_diff(argv)
-        await run_fzf(files)
+        await run_fzf(files, main=_main)
 
     else:
         never(mode)
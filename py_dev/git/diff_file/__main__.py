@@ -4,28 +4,27 @@ from os.path import normcase
 from pathlib import PurePath
 from shlex import join
 from sys import stdout
-from typing import Iterator, NoReturn, Sequence
+from typing import AsyncIterator, Iterator, NoReturn, Sequence
 
 from std2.asyncio.subprocess import call
 from std2.types import never
 
 from ...run import run_main
 from ..fzf import run_fzf
-from ..ops import pretty_diff, pretty_file
+from ..ops import pretty_diff, pretty_file, stream
 from ..spec_parse import SPEC, Mode, spec_parse
 
 
-async def _git_file_log(path: PurePath) -> bytes:
-    proc = await call(
+def _git_file_log(path: PurePath) -> AsyncIterator[bytes]:
+    return stream(
         "git",
         "log",
+        "-z",
         "--color",
-        "--pretty=format:%x00%Cgreen%h%Creset %Cblue%ad%Creset %s",
+        "--pretty=tformat:%Cgreen%h%Creset %Cblue%ad%Creset %s",
         "--",
         path,
-        capture_stderr=False,
     )
-    return proc.stdout.strip(b"\0")
 
 
 async def _git_show_diff(unified: int, sha: str, path: PurePath) -> bytes:
@@ -76,8 +75,7 @@ async def _main() -> int:
         stdout.write(join(chain(_parse_lines(lines), (normcase(args.path),))))
 
     elif mode is Mode.normal:
-        commits = await _git_file_log(args.path)
-        await run_fzf(commits)
+        await run_fzf(_git_file_log(args.path), main=_main, prefetch=True)
 
     else:
         never(mode)
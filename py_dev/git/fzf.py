@@ -1,9 +1,40 @@
-from os import environ
-from sys import argv
+from asyncio import FIRST_COMPLETED, Lock, Task, create_task, get_running_loop, wait
+from asyncio.subprocess import DEVNULL, PIPE, Process, create_subprocess_exec
+from contextlib import asynccontextmanager, contextmanager, suppress
+from functools import partial
+from os import close, devnull, environ
+from os.path import normcase
+from pathlib import Path
+from re import compile
+from secrets import token_urlsafe
+from shlex import quote
+from socket import AF_UNIX, SOCK_STREAM, recv_fds, socket
+from stat import S_IRWXU
+from subprocess import CalledProcessError
+from sys import argv, executable, stderr
+from tempfile import TemporaryDirectory
+from traceback import print_exception
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterator,
+    Mapping,
+    MutableSet,
+    Optional,
+    Sequence,
+    Union,
+)
 
-from std2.asyncio.subprocess import call
+from ..stdio import redirected
+from . import client
+from .client import LEN_BYTES, SH_ENV, SOCK_ENV
+from .spec_parse import ARGV_ENV, EOF, EXECUTE_HEAD, FZF_CMD, PREVIEW_HEAD
 
-from .spec_parse import ARGV_ENV, EOF, EXECUTE_HEAD, PREVIEW_HEAD
+if TYPE_CHECKING:
+    from .prefetch import Prefetch
 
 _SHARED_OPTS = (
     "--read0",
@@ -13,19 +44,242 @@ _SHARED_OPTS = (
     "--preview-window=right:70%:wrap",
 )
 
+_PREFETCH_SPAN = 3
+
+# FZF_API_KEY, the newest of the --listen features prefetch relies on
+_LISTEN_VERSION = (0, 48)
+_VERSION = compile(r"(\d+)\.(\d+)")
+
+_MAIN = Callable[[], Coroutine[Any, Any, int]]
+
+
+@contextmanager
+def _environ(env: Mapping[str, str]) -> Iterator[None]:
+    saved = {**environ}
+    try:
+        environ.update(env)
+        yield None
+    finally:
+        environ.clear()
+        environ.update(saved)
+
+
+def _recv(conn: socket) -> tuple[bytes, Sequence[int]]:
+    conn.setblocking(True)
+    try:
+        head, fds, _, _ = recv_fds(conn, LEN_BYTES, 3)
+        size = int.from_bytes(head, byteorder="big")
+        chunks = [head[LEN_BYTES:]]
+        acc = len(chunks[0])
+        while acc < size:
+            if not (chunk := conn.recv(size - acc)):
+                break
+            chunks.append(chunk)
+            acc += len(chunk)
+        return b"".join(chunks), fds
+    finally:
+        conn.setblocking(False)
+
+
+def _code(job: Task[int]) -> int:
+    if exn := job.exception():
+        if isinstance(exn, BrokenPipeError):
+            return 13
+        else:
+            print_exception(type(exn), exn, exn.__traceback__)
+            return 1
+    else:
+        return job.result()
+
+
+def _parse_env(lines: Sequence[str]) -> Mapping[str, str]:
+    return {key: val for key, _, val in (line.partition("=") for line in lines)}
+
+
+async def _handle(
+    lock: Lock, main: _MAIN, prefetch: Optional["Prefetch"], conn: socket
+) -> None:
+    loop = get_running_loop()
+    with conn:
+        msg, fds = await loop.run_in_executor(None, _recv, conn)
+        try:
+            cmd, *lines = msg.decode().split("\0")
+            env = _parse_env(lines)
+
+            _, _, pos = cmd.rpartition(EOF)
+            if prefetch and cmd.startswith(PREVIEW_HEAD) and pos.isdigit():
+                prefetch.schedule(int(pos), env=env)
+
+            async with lock:
+                with redirected(dict(enumerate(fds))), _environ(env):
+                    FZF_CMD.set(cmd)
+                    job = create_task(main())
+                    hup = create_task(loop.sock_recv(conn, 1))
+                    await wait((job, hup), return_when=FIRST_COMPLETED)
+                    hup.cancel()
+                    if not job.done():
+                        job.cancel()
+                        await wait((job,))
+                        return
+                    else:
+                        code = 1 if job.cancelled() else _code(job)
+
+            with suppress(OSError):
+                await loop.sock_sendall(conn, bytes((code & 0xFF,)))
+        finally:
+            for fd in fds:
+                close(fd)
+
+
+async def _render(lock: Lock, main: _MAIN, cmd: str, env: Mapping[str, str]) -> None:
+    with open(devnull, "r+b") as null:
+        fd = null.fileno()
+        async with lock:
+            with redirected({0: fd, 1: fd, 2: fd}), _environ(env):
+                FZF_CMD.set(cmd)
+                with suppress(Exception):
+                    await main()
+
 
-async def run_fzf(stdin: bytes) -> None:
+async def _serve(
+    sock: socket, lock: Lock, main: _MAIN, prefetch: Optional["Prefetch"]
+) -> None:
+    loop = get_running_loop()
+    tasks: MutableSet[Task] = set()
+    while True:
+        conn, _ = await loop.sock_accept(sock)
+        task = create_task(_handle(lock, main=main, prefetch=prefetch, conn=conn))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+
+def _prefetch(
+    tmp: Path, lock: Lock, main: _MAIN, api_key: str
+) -> tuple["Prefetch", Mapping[str, str]]:
+    from .prefetch import API_KEY_ENV, Prefetch
+
+    prefetch = Prefetch(
+        tmp=tmp, key=api_key, span=_PREFETCH_SPAN, render=partial(_render, lock, main)
+    )
+    return prefetch, {API_KEY_ENV: api_key}
+
+
+@asynccontextmanager
+async def _daemon(
+    main: _MAIN, api_key: Optional[str]
+) -> AsyncIterator[Mapping[str, str]]:
+    with TemporaryDirectory() as tmp:
+        sock_path = normcase(Path(tmp) / "sock")
+        shell = Path(tmp) / "sh"
+        sock = socket(AF_UNIX, SOCK_STREAM)
+
+        try:
+            sock.bind(sock_path)
+            sock.listen()
+        except OSError:
+            sock.close()
+            yield {}
+        else:
+            sock.setblocking(False)
+            py, script = quote(executable), quote(normcase(client.__file__))
+            shell.write_text(f'#!/bin/sh\nexec {py} -I -S {script} "$@"\n')
+            shell.chmod(S_IRWXU)
+
+            lock = Lock()
+            prefetch, env = (
+                _prefetch(Path(tmp), lock=lock, main=main, api_key=api_key)
+                if api_key
+                else (None, {})
+            )
+            task = create_task(_serve(sock, lock=lock, main=main, prefetch=prefetch))
+            try:
+                yield {**env, "SHELL": normcase(shell), SOCK_ENV: sock_path}
+            finally:
+                task.cancel()
+                await wait((task,))
+                if prefetch:
+                    await prefetch.close()
+                sock.close()
+
+
+async def _can_listen() -> bool:
+    try:
+        proc = await create_subprocess_exec(
+            "fzf", "--version", stdin=DEVNULL, stdout=PIPE, stderr=DEVNULL
+        )
+    except OSError:
+        return False
+    else:
+        out, _ = await proc.communicate()
+        if match := _VERSION.match(out.decode()):
+            major, minor = match.groups()
+            return (int(major), int(minor)) >= _LISTEN_VERSION
+        else:
+            return False
+
+
+async def _once(stdin: bytes) -> AsyncIterator[bytes]:
+    yield stdin
+
+
+async def _pump(stdin: AsyncIterator[bytes], proc: Process) -> None:
+    assert proc.stdin
+    try:
+        async for chunk in stdin:
+            proc.stdin.write(chunk)
+            await proc.stdin.drain()
+    except ConnectionError:
+        pass
+    finally:
+        proc.stdin.close()
+        if aclose := getattr(stdin, "aclose", None):
+            await aclose()
+
+
+async def run_fzf(
+    stdin: Union[bytes, AsyncIterator[bytes]], main: _MAIN, prefetch: bool = False
+) -> None:
     sh, *args = argv
     fin = f"--bind=return:abort+execute:{EXECUTE_HEAD}{{+f}}"
-    rhs = f"--preview={PREVIEW_HEAD}{{+f}}"
-    await call(
-        "fzf",
-        *_SHARED_OPTS,
-        rhs,
-        fin,
-        env={**environ, ARGV_ENV: EOF.join(args), "LC_ALL": "C", "SHELL": sh},
-        stdin=stdin,
-        capture_stdout=False,
-        capture_stderr=False,
-        check_returncode={0, 130},
-    )
+    rhs = f"--preview={PREVIEW_HEAD}{{+f}}{EOF}{{n}}"
+    env = {ARGV_ENV: EOF.join(args), "LC_ALL": "C"}
+    api_key = token_urlsafe() if prefetch and await _can_listen() else None
+    listen = ("--listen",) if api_key else ()
+
+    async with _daemon(main, api_key=api_key) as daemon:
+        proc = await create_subprocess_exec(
+            "fzf",
+            *_SHARED_OPTS,
+            *listen,
+            rhs,
+            fin,
+            env={
+                **environ,
+                **env,
+                "SHELL": sh,
+                SH_ENV: sh,
+                **daemon,
+            },
+            stdin=PIPE,
+        )
+        src = _once(stdin) if isinstance(stdin, bytes) else stdin
+        pump = create_task(_pump(src, proc=proc))
+        fzf = create_task(proc.wait())
+        try:
+            await wait((fzf, pump), return_when=FIRST_COMPLETED)
+            if not fzf.done() and pump.exception():
+                with suppress(ProcessLookupError):
+                    proc.terminate()
+            code = await fzf
+        finally:
+            fzf.cancel()
+            pump.cancel()
+            await wait((pump,))
+
+        if not pump.cancelled() and (exn := pump.exception()):
+            if isinstance(exn, CalledProcessError) and exn.stderr:
+                stderr.buffer.write(exn.stderr)
+                stderr.buffer.flush()
+            raise exn
+        elif code not in {0, 130}:
+            raise CalledProcessError(code, cmd=("fzf",))
@@ -28,7 +28,7 @@ async def _git_ls_files() -> AsyncIterator[PurePath]:
 
 async def _fzf_lhs(paths: Iterable[PurePath]) -> None:
     stdin = "\0".join(map(normcase, paths)).encode()
-    await run_fzf(stdin)
+    await run_fzf(stdin, main=_main)
 
 
 async def _git_show_blame(path: PurePath) -> None:
@@ -2,35 +2,26 @@ from argparse import ArgumentParser
 from pathlib import PurePath
 from shlex import join
 from sys import stdout
-from typing import AsyncIterator, Iterable, Iterator, NoReturn, Sequence
+from typing import AsyncIterator, Iterator, NoReturn, Sequence
 
-from std2.asyncio.subprocess import call
 from std2.types import never
 
 from ...run import run_main
 from ..fzf import run_fzf
-from ..ops import pretty_commit
+from ..ops import pretty_commit, stream
 from ..spec_parse import SPEC, Mode, spec_parse
 
 
-async def _git_ls_commits(paths: Sequence[PurePath]) -> AsyncIterator[tuple[str, str]]:
-    proc = await call(
+def _git_ls_commits(paths: Sequence[PurePath]) -> AsyncIterator[bytes]:
+    return stream(
         "git",
         "log",
+        "-z",
         "--color",
-        "--pretty=format:%x00%Cgreen%h%Creset %Cblue%ad%Creset %s",
+        "--pretty=tformat:%Cgreen%h%Creset %Cblue%ad%Creset %s",
         "--",
         *paths,
-        capture_stderr=False,
     )
-    for commit in proc.stdout.decode().strip("\0").split("\0"):
-        sha, _, date = commit.partition(" ")
-        yield sha, date
-
-
-async def _fzf_lhs(commits: Iterable[tuple[str, str]]) -> None:
-    stdin = "\0".join(f"{sha} {date}" for sha, date in commits).encode()
-    await run_fzf(stdin)
 
 
 def _parse_args() -> SPEC:
@@ -57,8 +48,7 @@ async def _main() -> int:
         stdout.write(join(_parse_lines(lines)))
 
     elif mode is Mode.normal:
-        commits = [el async for el in _git_ls_commits(args.paths)]
-        await _fzf_lhs(commits)
+        await run_fzf(_git_ls_commits(args.paths), main=_main, prefetch=True)
 
     else:
         never(mode)
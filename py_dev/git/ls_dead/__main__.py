@@ -2,36 +2,28 @@ from argparse import ArgumentParser
 from os import linesep
 from os.path import normcase
 from pathlib import Path, PurePath
+from sys import stdout
 from tempfile import mkdtemp
 from typing import AsyncIterator, Iterable, Iterator, NoReturn, Sequence
 
-from std2.asyncio.subprocess import call
 from std2.types import never
 
 from ...run import run_main
 from ..fzf import run_fzf
-from ..ops import git_root, pretty_file, print_argv
+from ..ops import pretty_file, print_argv
 from ..spec_parse import SPEC, Mode, spec_parse
+from .index import dead_files
+from .restore import resolve, write_tar, write_tree
+
+_ABBREV = 12
+_GREEN, _BLUE, _RESET = "\x1b[32m", "\x1b[34m", "\x1b[m"
 
 
 async def _git_dead_files() -> AsyncIterator[tuple[str, str, PurePath]]:
-    proc = await call(
-        "git",
-        "log",
-        "--diff-filter=D",
-        "--name-only",
-        "--relative",
-        "--color",
-        "--pretty=format:%x00%Cgreen%h%Creset %Cblue%ad%Creset",
-        "--",
-        capture_stderr=False,
-    )
-    for commit in proc.stdout.decode().strip("\0").split("\0"):
-        meta, *paths = commit.split(linesep)
-        sha, _, date = meta.partition(" ")
-        for path in paths:
-            if path:
-                yield f"{sha}~", date, PurePath(path)
+    for dead in await dead_files():
+        sha = f"{_GREEN}{dead.sha[:_ABBREV]}{_RESET}~"
+        date = f"{_BLUE}{dead.date}{_RESET}"
+        yield sha, date, PurePath(dead.path)
 
 
 async def _fzf_lhs(paths: Iterable[tuple[str, str, PurePath]]) -> None:
@@ -39,36 +31,29 @@ async def _fzf_lhs(paths: Iterable[tuple[str, str, PurePath]]) -> None:
         f"{sha}{linesep}{date}{linesep}{normcase(path)}" for sha, date, path in paths
     )
     stdin = "\0".join(lines).encode()
-    await run_fzf(stdin)
+    await run_fzf(stdin, main=_main)
 
 
 async def _fzf_rhs(sha: str, path: PurePath) -> None:
     await pretty_file(sha, path)
 
 
-async def _git_show_many(it: Iterable[tuple[str, PurePath]]) -> None:
-    root = await git_root()
-    cwd = Path.cwd()
-    tmp = Path(mkdtemp())
-    for sha, path in it:
-        temp = tmp / path
-        abs = cwd / path
-        rel = abs.relative_to(root)
-        proc = await call(
-            "git",
-            "show",
-            "--relative",
-            f"{sha}:{rel}",
-            capture_stderr=False,
-        )
-        temp.parent.mkdir(parents=True, exist_ok=True)
-        temp.write_bytes(proc.stdout)
+async def _git_show_many(it: Iterable[tuple[str, PurePath]], tar: bool) -> None:
+    blobs = await resolve(it)
 
-    print_argv(normcase(tmp), escape=False)
+    if tar:
+        stdout.flush()
+        write_tar(stdout.buffer, blobs=blobs)
+        stdout.buffer.flush()
+    else:
+        tmp = Path(mkdtemp())
+        await write_tree(tmp, blobs=blobs)
+        print_argv(normcase(tmp), escape=False)
 
 
 def _parse_args() -> SPEC:
     parser = ArgumentParser()
+    parser.add_argument("--tar", action="store_true")
     return spec_parse(parser)
 
 
@@ -79,14 +64,14 @@ def _parse_lines(lines: Sequence[str]) -> Iterator[tuple[str, PurePath]]:
 
 
 async def _main() -> int:
-    mode, lines, _ = _parse_args()
+    mode, lines, args = _parse_args()
 
     if mode is Mode.preview:
         (sha, path), *_ = _parse_lines(lines)
         await _fzf_rhs(sha, path=PurePath(path))
 
     elif mode is Mode.execute:
-        await _git_show_many(_parse_lines(lines))
+        await _git_show_many(_parse_lines(lines), tar=args.tar)
 
     elif mode is Mode.normal:
         paths = [path async for path in _git_dead_files()]
@@ -0,0 +1,139 @@
+from contextlib import suppress
+from dataclasses import dataclass
+from os import getpid
+from pathlib import Path, PurePosixPath
+from typing import AbstractSet, Iterator, Optional, Sequence
+from uuid import uuid4
+
+from std2.asyncio.subprocess import call
+
+_HEADER = b"py-dev-dead-v1"
+
+
+@dataclass(frozen=True)
+class Dead:
+    sha: str
+    date: str
+    path: PurePosixPath
+
+
+@dataclass(frozen=True)
+class _Index:
+    tip: str
+    dead: Sequence[Dead]
+
+
+async def _git(*args: str, check: bool = True) -> Optional[str]:
+    proc = await call(
+        "git",
+        *args,
+        capture_stderr=False,
+        check_returncode={0} if check else set(),
+    )
+    return proc.stdout.decode().rstrip("\n") if not proc.returncode else None
+
+
+async def _index_path() -> Path:
+    common = await _git("rev-parse", "--git-common-dir")
+    assert common is not None
+    return Path.cwd() / common / "py-dev" / "dead-files"
+
+
+def _parse_log(raw: bytes) -> Iterator[Dead]:
+    for block in raw.split(b"\0\0"):
+        head, _, paths = block.strip(b"\0").partition(b"\n")
+        sha, _, date = head.decode().partition(" ")
+        for path in paths.split(b"\0"):
+            if path:
+                yield Dead(sha=sha, date=date, path=PurePosixPath(path.decode()))
+
+
+async def _log(*revs: str) -> Sequence[Dead]:
+    proc = await call(
+        "git",
+        "log",
+        "--diff-filter=D",
+        "--name-only",
+        "-z",
+        "--pretty=format:%H %ad",
+        *revs,
+        "--",
+        capture_stderr=False,
+    )
+    return tuple(_parse_log(proc.stdout))
+
+
+async def _rev_list(rev: str) -> AbstractSet[str]:
+    out = await _git("rev-list", rev)
+    return {*out.split()} if out else set()
+
+
+def _load(path: Path) -> Optional[_Index]:
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return None
+
+    header, _, body = raw.partition(b"\n")
+    version, _, tip = header.partition(b" ")
+    if version != _HEADER or not tip:
+        return None
+    else:
+        fields = body.split(b"\0")
+        dead = tuple(
+            Dead(sha=sha.decode(), date=date.decode(), path=PurePosixPath(p.decode()))
+            for sha, date, p in zip(fields[0::3], fields[1::3], fields[2::3])
+        )
+        return _Index(tip=tip.decode(), dead=dead)
+
+
+def _dump(path: Path, index: _Index) -> None:
+    tmp = path.with_name(f".{path.name}-{getpid()}-{uuid4().hex}")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as fp:
+            fp.write(_HEADER + b" " + index.tip.encode() + b"\n")
+            for dead in index.dead:
+                fields = (dead.sha, dead.date, str(dead.path))
+                fp.write(b"".join(field.encode() + b"\0" for field in fields))
+        tmp.replace(path)
+    except OSError:
+        with suppress(OSError):
+            tmp.unlink()
+
+
+async def _update(index: Optional[_Index], head: str) -> _Index:
+    if index and index.tip == head:
+        return index
+
+    elif index and (base := await _git("merge-base", index.tip, head, check=False)):
+        gone = await _rev_list(f"{base}..{index.tip}") if base != index.tip else set()
+        kept = tuple(dead for dead in index.dead if dead.sha not in gone)
+        new = await _log(f"{base}..{head}")
+        return _Index(tip=head, dead=(*new, *kept))
+
+    else:
+        return _Index(tip=head, dead=await _log(head))
+
+
+async def dead_files() -> Sequence[Dead]:
+    head = await _git("rev-parse", "--verify", "--quiet", "HEAD", check=False)
+    if not head:
+        return ()
+
+    path = await _index_path()
+    index = _load(path)
+    updated = await _update(index, head=head)
+    if updated is not index:
+        _dump(path, index=updated)
+
+    prefix = await _git("rev-parse", "--show-prefix") or ""
+    return tuple(
+        Dead(
+            sha=dead.sha,
+            date=dead.date,
+            path=PurePosixPath(str(dead.path)[len(prefix) :]),
+        )
+        for dead in updated.dead
+        if str(dead.path).startswith(prefix)
+    )
@@ -0,0 +1,99 @@
+from asyncio import gather, get_running_loop
+from dataclasses import dataclass
+from io import BytesIO
+from os import fsdecode
+from pathlib import Path, PurePath
+from stat import S_IMODE, S_ISLNK, S_ISREG
+from tarfile import SYMTYPE, TarFile, TarInfo
+from time import time
+from typing import IO, Iterable, Iterator, Mapping, MutableMapping, Sequence
+
+from ..ops import cat_file, git_root
+
+
+@dataclass(frozen=True)
+class Blob:
+    path: PurePath
+    mode: int
+    content: bytes
+
+
+def _parse_tree(raw: bytes, width: int) -> Iterator[tuple[str, tuple[int, str]]]:
+    pos = 0
+    while pos < len(raw):
+        sp = raw.index(b" ", pos)
+        nul = raw.index(b"\0", sp)
+        oid = raw[nul + 1 : nul + 1 + width]
+        yield raw[sp + 1 : nul].decode(), (int(raw[pos:sp], 8), oid.hex())
+        pos = nul + 1 + width
+
+
+async def resolve(specs: Iterable[tuple[str, PurePath]]) -> Sequence[Blob]:
+    specs = tuple(specs)
+    root, cwd = await git_root(), Path.cwd()
+    rels = tuple(
+        (sha, (cwd / path).relative_to(root).as_posix()) for sha, path in specs
+    )
+
+    dirs = tuple({(sha, rel.rpartition("/")[0]): None for sha, rel in rels})
+    listed = await cat_file(*(f"{sha}:{parent}" for sha, parent in dirs))
+    trees: MutableMapping[tuple[str, str], Mapping[str, tuple[int, str]]] = {}
+    for key, tree in zip(dirs, listed):
+        if tree and tree[0].type == "tree":
+            info, raw = tree
+            trees[key] = dict(_parse_tree(raw, width=len(info.oid) // 2))
+
+    entries = []
+    for sha, rel in rels:
+        parent, _, name = rel.rpartition("/")
+        mode, oid = trees.get((sha, parent), {}).get(name, (0, ""))
+        if not (S_ISREG(mode) or S_ISLNK(mode)):
+            raise LookupError(f"{sha}:{rel}")
+        else:
+            entries.append((mode, oid))
+
+    objs = await cat_file(*(oid for _, oid in entries))
+    blobs: MutableMapping[PurePath, Blob] = {}
+    for (_, path), (mode, oid), obj in zip(specs, entries, objs):
+        if not obj:
+            raise LookupError(oid)
+        else:
+            _, content = obj
+            blobs[path] = Blob(path=path, mode=mode, content=content)
+
+    return tuple(blobs.values())
+
+
+def _write(root: Path, blob: Blob) -> None:
+    dest = root / blob.path
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if S_ISLNK(blob.mode):
+        try:
+            dest.symlink_to(fsdecode(blob.content))
+        except OSError:
+            dest.write_bytes(blob.content)
+    else:
+        dest.write_bytes(blob.content)
+        dest.chmod(S_IMODE(blob.mode))
+
+
+async def write_tree(root: Path, blobs: Iterable[Blob]) -> None:
+    loop = get_running_loop()
+    await gather(*(loop.run_in_executor(None, _write, root, blob) for blob in blobs))
+
+
+def write_tar(fp: IO[bytes], blobs: Iterable[Blob]) -> None:
+    mtime = int(time())
+    with TarFile.open(fileobj=fp, mode="w|") as tar:
+        for blob in blobs:
+            info = TarInfo(blob.path.as_posix())
+            info.mtime = mtime
+            if S_ISLNK(blob.mode):
+                info.type = SYMTYPE
+                info.mode = 0o777
+                info.linkname = fsdecode(blob.content)
+                tar.addfile(info)
+            else:
+                info.mode = S_IMODE(blob.mode)
+                info.size = len(blob.content)
+                tar.addfile(info, BytesIO(blob.content))
@@ -2,14 +2,14 @@ from argparse import ArgumentParser
 from itertools import chain, repeat
 from pathlib import PurePath
 from re import compile
-from typing import NoReturn, Optional, Sequence
+from typing import AsyncIterator, NoReturn, Optional, Sequence
 
 from std2.asyncio.subprocess import call
 from std2.types import never
 
 from ...run import run_main
 from ..fzf import run_fzf
-from ..ops import pretty_commit, pretty_diff, pretty_file, print_argv
+from ..ops import pretty_commit, pretty_diff, pretty_file, print_argv, stream
 from ..spec_parse import SPEC, Mode, spec_parse
 
 
@@ -20,27 +20,22 @@ def _ref(ref: str) -> tuple[str, int]:
     return refname, int(pos)
 
 
-async def _git_reflog(
+def _git_reflog(
     regex: bool, path: Optional[PurePath], search: Sequence[str]
-) -> bytes:
-    proc = await call(
+) -> AsyncIterator[bytes]:
+    return stream(
         "git",
         "log",
         "--walk-reflogs",
+        "-z",
         "--color",
         "--remove-empty",
-        "--pretty=format:%x00%Cgreen%gD%Creset %Cblue%ad%Creset %s",
+        "--pretty=tformat:%Cgreen%gD%Creset %Cblue%ad%Creset %s",
         *(("--perl-regexp",) if regex else ("--fixed-strings",)),
         *chain.from_iterable(zip(repeat("--grep-reflog"), search)),
         "--",
         *((path,) if path else ()),
-        capture_stderr=False,
     )
-    return proc.stdout.strip(b"\0")
-
-
-async def _fzf_lhs(reflog: bytes) -> None:
-    await run_fzf(reflog)
 
 
 async def _git_show_diff(unified: int, ref: str, path: PurePath) -> None:
@@ -97,8 +92,8 @@ async def _main() -> int:
         print_argv(f"{re}@{{{pos + 1}}}", escape=False)
 
     elif mode is Mode.normal:
-        reflog = await _git_reflog(args.regex, path=args.path, search=args.search)
-        await _fzf_lhs(reflog)
+        reflog = _git_reflog(args.regex, path=args.path, search=args.search)
+        await run_fzf(reflog, main=_main, prefetch=True)
 
     else:
         never(mode)
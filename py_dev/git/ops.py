@@ -1,17 +1,38 @@
-from asyncio import gather
-from functools import lru_cache
+from asyncio import Lock, create_task, gather
+from asyncio.subprocess import DEVNULL, PIPE, Process, create_subprocess_exec
+from contextlib import suppress
+from dataclasses import dataclass
+from hashlib import sha256
 from os import environ, linesep
+from os.path import normcase
 from pathlib import Path, PurePath
 from shlex import join, split
 from shutil import which
+from subprocess import CalledProcessError
 from sys import stdout
-from tempfile import NamedTemporaryFile
-from typing import Optional
+from tempfile import TemporaryFile
+from typing import AsyncIterator, Awaitable, Callable, Optional, Sequence, Union
 
 from std2.asyncio.subprocess import call
 from std2.shutil import hr
 
+from ..cache import DiskCache, cache_dir
+from ..ccat.consts import DEFAULT_STYLE, HIGHLIGHTER_ENV
 from ..ccat.pprn import pprn_basic
+from ..stdio import redirected
+
+_CHUNK = 2**16
+
+_PREVIEWS = DiskCache(cache_dir("previews"), max_bytes=2**28)
+
+_COMMIT_FORMAT = (
+    "%C(always,yellow)commit %H%C(always,reset)%n"
+    "Merge: %p%n"
+    "Author: %an <%ae>%n"
+    "Date:   %ad%n"
+    "%n"
+    "%w(0,4,4)%B%w(0,0,0)%x00"
+)
 
 
 def print_argv(*args: str, escape: bool) -> None:
@@ -20,45 +41,191 @@ def print_argv(*args: str, escape: bool) -> None:
 
 
 async def pprn(content: bytes, path: Optional[PurePath]) -> None:
-    if path and (bat := which("bat")):
-        suffix = "".join(path.suffixes)
-        with NamedTemporaryFile(suffix=suffix) as fd:
-            fd.write(content)
-            fd.flush()
-            await call(
-                bat,
-                "--color=always",
-                "--",
-                fd.name,
-                capture_stdout=False,
-                capture_stderr=False,
-            )
+    highlighter = environ.get(HIGHLIGHTER_ENV, "")
+    if path and highlighter == "bat" and (bat := which("bat")):
+        await call(
+            bat,
+            "--color=always",
+            f"--file-name={path.name}",
+            stdin=content,
+            capture_stdout=False,
+            capture_stderr=False,
+        )
     else:
-        pretty = pprn_basic(path, text=content.decode())
+        pretty = pprn_basic(path, text=content)
         stdout.write(pretty)
 
 
-@lru_cache(maxsize=None)
+async def stream(prog: str, *args: Union[str, PurePath]) -> AsyncIterator[bytes]:
+    proc = await create_subprocess_exec(prog, *args, stdout=PIPE, stderr=PIPE)
+    assert proc.stdout and proc.stderr
+    err = create_task(proc.stderr.read())
+    try:
+        while chunk := await proc.stdout.read(_CHUNK):
+            yield chunk
+    except BaseException:
+        with suppress(ProcessLookupError):
+            proc.kill()
+        await proc.wait()
+        err.cancel()
+        raise
+    else:
+        code = await proc.wait()
+        stderr = await err
+        if code:
+            raise CalledProcessError(code, cmd=(prog, *map(str, args)), stderr=stderr)
+
+
+_GIT_ROOT: dict[PurePath, PurePath] = {}
+
+
 async def git_root() -> PurePath:
-    proc = await call("git", "rev-parse", "--show-toplevel", capture_stderr=False)
-    return PurePath(proc.stdout.rstrip().decode())
+    cwd = Path.cwd()
+    if (root := _GIT_ROOT.get(cwd)) is None:
+        proc = await call("git", "rev-parse", "--show-toplevel", capture_stderr=False)
+        root = _GIT_ROOT[cwd] = PurePath(proc.stdout.rstrip().decode())
+    return root
 
 
-async def pretty_file(sha: str, path: PurePath) -> None:
+@dataclass(frozen=True)
+class GitObj:
+    oid: str
+    type: str
+    size: int
+
+
+class _CatFile:
+    def __init__(self, *args: str) -> None:
+        self._args = args
+        self._lock: Optional[Lock] = None
+        self._proc: Optional[Process] = None
+
+    async def _spawn(self) -> Process:
+        if not self._proc or self._proc.returncode is not None:
+            self._proc = await create_subprocess_exec(
+                "git",
+                "cat-file",
+                *self._args,
+                stdin=PIPE,
+                stdout=PIPE,
+                stderr=DEVNULL,
+            )
+        return self._proc
+
+    def _kill(self) -> None:
+        if self._proc and self._proc.returncode is None:
+            self._proc.kill()
+        self._proc = None
+
+    async def request(
+        self, objs: Sequence[str], content: bool
+    ) -> Sequence[Optional[tuple[GitObj, bytes]]]:
+        self._lock = self._lock or Lock()
+        async with self._lock:
+            proc = await self._spawn()
+            assert proc.stdin and proc.stdout
+            stdin, stdout = proc.stdin, proc.stdout
+
+            async def send() -> None:
+                for obj in objs:
+                    assert "\n" not in obj, obj
+                    stdin.write(obj.encode() + b"\n")
+                    await stdin.drain()
+
+            async def recv() -> Sequence[Optional[tuple[GitObj, bytes]]]:
+                acc: list[Optional[tuple[GitObj, bytes]]] = []
+                for _ in objs:
+                    header = (await stdout.readline()).decode().rstrip("\n")
+                    if header.endswith((" missing", " ambiguous")):
+                        acc.append(None)
+                    else:
+                        oid, type, size = header.rsplit(" ", 2)
+                        obj = GitObj(oid=oid, type=type, size=int(size))
+                        if content:
+                            data = await stdout.readexactly(obj.size + 1)
+                            acc.append((obj, data[:-1]))
+                        else:
+                            acc.append((obj, b""))
+                return acc
+
+            try:
+                _, acc = await gather(send(), recv())
+            except BaseException:
+                self._kill()
+                raise
+            else:
+                return acc
+
+
+_BATCH = _CatFile("--batch")
+_BATCH_CHECK = _CatFile("--batch-check")
+
+
+async def cat_file(*objs: str) -> Sequence[Optional[tuple[GitObj, bytes]]]:
+    return await _BATCH.request(objs, content=True)
+
+
+async def cat_file_check(*objs: str) -> Sequence[Optional[GitObj]]:
+    acc = await _BATCH_CHECK.request(objs, content=False)
+    return tuple(el[0] if el else None for el in acc)
+
+
+async def git_rel(path: PurePath) -> PurePath:
     root = await git_root()
     abs = Path.cwd() / path
-    rel = abs.relative_to(root)
-    proc = await call(
-        "git",
-        "show",
-        "--relative",
-        f"{sha}:{rel}",
-        capture_stderr=False,
+    return abs.relative_to(root)
+
+
+def _render_key() -> Sequence[str]:
+    return (
+        environ.get("GIT_PAGER", ""),
+        environ.get(HIGHLIGHTER_ENV, ""),
+        which("delta") or "",
+        which("bat") or "",
+        environ.get("BAT_THEME", ""),
+        environ.get("DELTA_FEATURES", ""),
+        DEFAULT_STYLE,
+        environ.get("FZF_PREVIEW_COLUMNS", environ.get("COLUMNS", "")),
     )
-    await pprn(proc.stdout, path=path)
 
 
-async def pretty_diff(diff: bytes, path: Optional[PurePath]) -> None:
+async def _cached(key: Sequence[str], render: Callable[[], Awaitable[None]]) -> None:
+    full_key = ("v3", *key, *_render_key())
+    stdout.flush()
+
+    if (hit := _PREVIEWS.get(full_key)) is not None:
+        stdout.buffer.write(hit)
+    else:
+        with TemporaryFile() as fp:
+            try:
+                with redirected({stdout.fileno(): fp.fileno()}):
+                    await render()
+            finally:
+                fp.seek(0)
+                data = fp.read()
+                stdout.buffer.write(data)
+
+        _PREVIEWS.put(full_key, data)
+
+
+async def pretty_file(sha: str, path: PurePath) -> None:
+    rel = await git_rel(path)
+    name = f"{sha}:{rel}"
+    (info,) = await cat_file_check(name)
+    if not info:
+        raise LookupError(name)
+    else:
+
+        async def render() -> None:
+            (obj,) = await cat_file(info.oid)
+            assert obj
+            _, content = obj
+            await pprn(content, path=path)
+
+        await _cached(("file", info.oid, path.name), render)
+
+
+async def _pretty_diff(diff: bytes, path: Optional[PurePath]) -> None:
     if args := split(environ.get("GIT_PAGER", "")):
         await call(
             *args,
@@ -79,31 +246,70 @@ async def pretty_diff(diff: bytes, path: Optional[PurePath]) -> None:
         await pprn(diff, path=path)
 
 
-async def pretty_commit(unified: int, sha: str) -> None:
-    c1 = call(
-        "git",
-        "log",
-        "--max-count=1",
-        "--color",
-        "--name-status",
-        "--relative",
-        sha,
-        capture_stdout=False,
-        capture_stderr=False,
-    )
-    c2 = call(
+async def pretty_diff(diff: bytes, path: Optional[PurePath]) -> None:
+    async def render() -> None:
+        await _pretty_diff(diff, path=path)
+
+    digest = sha256(diff).hexdigest()
+    name = path.name if path else ""
+    await _cached(("diff", digest, name), render)
+
+
+def _split_commit(show: bytes) -> tuple[bytes, Sequence[bytes], bytes]:
+    commit, _, rest = show.partition(b"\n")
+    merge, _, rest = rest.partition(b"\n")
+    header, _, body = rest.partition(b"\0")
+    if b" " in merge[len(b"Merge: ") :]:
+        header = b"\n".join((commit, merge, header))
+    else:
+        header = b"\n".join((commit, header))
+    name_status: list[bytes] = []
+    pos = len(body) - len(body.lstrip(b"\n"))
+    while body.startswith(b":", pos):
+        end = body.find(b"\n", pos)
+        end = len(body) if end == -1 else end
+        meta, _, paths = body[pos:end].partition(b"\t")
+        _, _, status = meta.rpartition(b" ")
+        name_status.append(status + b"\t" + paths + b"\n")
+        pos = end + 1
+
+    patch = body[pos:].lstrip(b"\n")
+    return header, name_status, patch
+
+
+async def _pretty_commit(unified: int, sha: str) -> None:
+    proc = await call(
         "git",
         "show",
         "--submodule",
         "--relative",
+        "--raw",
+        "--patch",
         f"--unified={unified}",
-        "--pretty=format:",
+        f"--format={_COMMIT_FORMAT}",
         sha,
         capture_stderr=False,
     )
+    header, name_status, patch = _split_commit(proc.stdout)
 
-    _, proc = await gather(c1, c2)
+    stdout.flush()
+    stdout.buffer.write(header)
+    if name_status:
+        stdout.buffer.write(b"\n")
+        stdout.buffer.writelines(name_status)
+    stdout.buffer.flush()
 
     stdout.writelines((linesep, hr(), linesep))
     stdout.flush()
-    await pretty_diff(proc.stdout, path=None)
+    await _pretty_diff(patch, path=None)
+
+
+async def pretty_commit(unified: int, sha: str) -> None:
+    async def render() -> None:
+        await _pretty_commit(unified, sha=sha)
+
+    (info,), rel = await gather(cat_file_check(sha), git_rel(PurePath()))
+    if info:
+        await _cached(("commit", info.oid, str(unified), normcase(rel)), render)
+    else:
+        await render()
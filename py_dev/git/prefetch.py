@@ -0,0 +1,83 @@
+from asyncio import Task, create_task, get_running_loop, wait
+from http.client import HTTPConnection, HTTPException
+from json import loads
+from pathlib import Path
+from re import compile
+from tempfile import NamedTemporaryFile
+from typing import Any, Awaitable, Callable, Mapping, MutableSet, Optional, Sequence
+from urllib.parse import urlencode
+
+from .spec_parse import EOF, PREVIEW_HEAD
+
+API_KEY_ENV = "FZF_API_KEY"
+
+_PORT_ENV = "FZF_PORT"
+_POS_ENV = "FZF_POS"
+_TIMEOUT = 1
+
+_ANSI = compile(r"\x1b\[[0-9;]*m")
+
+RENDER = Callable[[str, Mapping[str, str]], Awaitable[None]]
+
+
+def _fetch(port: int, key: str, **params: int) -> Mapping[str, Any]:
+    conn = HTTPConnection("localhost", port, timeout=_TIMEOUT)
+    try:
+        conn.request("GET", f"/?{urlencode(params)}", headers={"x-api-key": key})
+        state: Mapping[str, Any] = loads(conn.getresponse().read())
+        return state
+    finally:
+        conn.close()
+
+
+class Prefetch:
+    def __init__(self, tmp: Path, key: str, span: int, render: RENDER) -> None:
+        self._tmp, self._key, self._span, self._render = tmp, key, span, render
+        self._task: Optional[Task] = None
+        self._done: MutableSet[int] = set()
+
+    async def _visible(self, env: Mapping[str, str]) -> Sequence[tuple[int, str]]:
+        loop = get_running_loop()
+        port = int(env[_PORT_ENV])
+
+        if (pos := env.get(_POS_ENV, "")).isdigit():
+            cursor = int(pos) - 1
+        else:
+            state = await loop.run_in_executor(None, _fetch, port, self._key)
+            cursor = state["position"]
+
+        offset = max(0, cursor - self._span)
+        limit = cursor - offset + self._span + 1
+        state = await loop.run_in_executor(
+            None, lambda: _fetch(port, self._key, limit=limit, offset=offset)
+        )
+        near = sorted(
+            enumerate(state["matches"], start=offset),
+            key=lambda el: abs(el[0] - cursor),
+        )
+        return tuple((match["index"], match["text"]) for _, match in near)
+
+    async def _run(self, current: int, env: Mapping[str, str]) -> None:
+        try:
+            visible = await self._visible(env)
+        except (OSError, HTTPException, ValueError, LookupError):
+            return
+
+        for idx, text in visible:
+            if idx != current and idx not in self._done:
+                with NamedTemporaryFile(dir=self._tmp) as fp:
+                    fp.write(_ANSI.sub("", text).encode() + b"\0")
+                    fp.flush()
+                    await self._render(f"{PREVIEW_HEAD}{fp.name}{EOF}{idx}", env)
+                self._done.add(idx)
+
+    def schedule(self, current: int, env: Mapping[str, str]) -> None:
+        self._done.add(current)
+        if self._task:
+            self._task.cancel()
+        self._task = create_task(self._run(current, env=env))
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await wait((self._task,))
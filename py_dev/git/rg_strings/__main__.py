@@ -2,30 +2,28 @@ from argparse import ArgumentParser
 from itertools import chain, repeat
 from shlex import join
 from sys import stdout
-from typing import Iterator, NoReturn, Sequence
+from typing import AsyncIterator, Iterator, NoReturn, Sequence
 
-from std2.asyncio.subprocess import call
 from std2.types import never
 
 from ...run import run_main
 from ..fzf import run_fzf
-from ..ops import pretty_commit
+from ..ops import pretty_commit, stream
 from ..spec_parse import SPEC, Mode, spec_parse
 
 
-async def _rg_commits(regex: bool, search: str, *searches: str) -> bytes:
-    proc = await call(
+def _rg_commits(regex: bool, search: str, *searches: str) -> AsyncIterator[bytes]:
+    return stream(
         "git",
         "log",
         "--all",
         "--relative",
+        "-z",
         "--color",
-        "--pretty=format:%x00%Cgreen%h%Creset %Cblue%ad%Creset %s",
+        "--pretty=tformat:%Cgreen%h%Creset %Cblue%ad%Creset %s",
         *(("--pickaxe-regex",) if regex else ()),
         *chain.from_iterable(zip(repeat("-S"), chain((search,), searches))),
-        capture_stderr=False,
     )
-    return proc.stdout.strip(b"\0")
 
 
 def _parse_args() -> SPEC:
@@ -55,8 +53,7 @@ async def _main() -> int:
         stdout.write(join(f"{line}^" for line in _parse_lines(lines)))
 
     elif mode is Mode.normal:
-        commits = await _rg_commits(args.regex, *args.search)
-        await run_fzf(commits)
+        await run_fzf(_rg_commits(args.regex, *args.search), main=_main, prefetch=True)
 
     else:
         never(mode)
@@ -60,7 +60,7 @@ async def _main() -> int:
 
     elif mode is Mode.normal:
         files = await _git_commit_files(args.commit)
-        await run_fzf(files)
+        await run_fzf(files, main=_main)
 
     else:
         never(mode)
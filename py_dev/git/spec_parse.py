@@ -1,8 +1,9 @@
 from argparse import ArgumentParser, Namespace
+from contextvars import ContextVar
 from enum import Enum, auto
 from os import environ
 from pathlib import Path
-from typing import Sequence
+from typing import Optional, Sequence
 
 from std2.string import removeprefix
 
@@ -12,6 +13,8 @@ ARGV_ENV = "__PY_DEV_ARGV__"
 EXECUTE_HEAD = "execute::"
 PREVIEW_HEAD = "preview::"
 
+FZF_CMD: ContextVar[Optional[str]] = ContextVar("FZF_CMD", default=None)
+
 
 class Mode(Enum):
     normal = auto()
@@ -28,22 +31,31 @@ def _parse_args() -> Namespace:
     return parser.parse_args()
 
 
-def spec_parse(parser: ArgumentParser) -> SPEC:
-    if (fzf_argv := environ.get(ARGV_ENV)) is not None:
-        cmd = _parse_args().cmd
-        argv = fzf_argv.split(EOF) if fzf_argv else ()
+def _parse_cmd(cmd: str) -> tuple[Mode, Path]:
+    if cmd.startswith(PREVIEW_HEAD):
+        path, _, _ = removeprefix(cmd, PREVIEW_HEAD).partition(EOF)
+        return Mode.preview, Path(path)
+    elif cmd.startswith(EXECUTE_HEAD):
+        return Mode.execute, Path(removeprefix(cmd, EXECUTE_HEAD))
+    else:
+        assert False, cmd
+
 
-        if cmd.startswith(PREVIEW_HEAD):
-            mode = Mode.preview
-            tmp = Path(removeprefix(cmd, PREVIEW_HEAD))
-        elif cmd.startswith(EXECUTE_HEAD):
-            mode = Mode.execute
-            tmp = Path(removeprefix(cmd, EXECUTE_HEAD))
-        else:
-            assert False, cmd
+def _read_lines(tmp: Path) -> Sequence[str]:
+    return tmp.read_text().rstrip("\0").split("\0")
 
+
+def spec_parse(parser: ArgumentParser) -> SPEC:
+    if (cmd := FZF_CMD.get()) is not None:
+        mode, tmp = _parse_cmd(cmd)
+        args = parser.parse_args()
+        return mode, _read_lines(tmp), args
+
+    elif (fzf_argv := environ.get(ARGV_ENV)) is not None:
+        mode, tmp = _parse_cmd(_parse_args().cmd)
+        argv = fzf_argv.split(EOF) if fzf_argv else ()
         args = parser.parse_args(argv)
-        lines = tmp.read_text().rstrip("\0").split("\0")
-        return mode, lines, args
+        return mode, _read_lines(tmp), args
+
     else:
         return Mode.normal, (), parser.parse_args()
@@ -1,4 +1,4 @@
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, FileType, Namespace
 from typing import NoReturn
 from webbrowser import open as w_open
 
@@ -8,12 +8,16 @@ from ...log import log
 from ...run import run_main
 from .envsubst import envsubst
 from .serve import serve
+from .workers import WORKERS
 
 
 def _parse_args() -> Namespace:
     parser = ArgumentParser()
     parser.add_argument("-p", "--port", type=int, default=0)
     parser.add_argument("-o", "--open", action="store_true")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--access-log", type=FileType("a"))
+    parser.add_argument("--metrics", action="store_true")
     return parser.parse_args()
 
 
@@ -21,7 +25,13 @@ async def _main() -> int:
     args = _parse_args()
     await envsubst()
 
-    if httpd := serve(args.port, promiscuous=args.open):
+    if httpd := serve(
+        args.port,
+        promiscuous=args.open,
+        access_log=args.access_log,
+        metrics=args.metrics,
+        workers=args.workers,
+    ):
         host = httpd.server_name if args.open else "localhost"
         location = f"http://{host}:{httpd.server_port}"
         w_open(location)
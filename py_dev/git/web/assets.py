@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from hashlib import sha256
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from mimetypes import guess_type
+from pathlib import Path, PurePosixPath
+from typing import Mapping, Optional
+
+from ...srv.encoding import accepts_gzip, compressible, gzip_bytes
+from ...srv.validators import not_modified, variant_etag
+
+_CACHE_CONTROL = "public, max-age=604800"
+_VARY = "Accept-Encoding"
+
+
+@dataclass(frozen=True)
+class Asset:
+    mime: str
+    tag: str
+    identity: bytes
+    gzip: Optional[bytes]
+
+
+def load_assets(root: Path) -> Mapping[PurePosixPath, Asset]:
+    assets = {}
+    for path in root.resolve().rglob("*"):
+        if path.is_file():
+            data = path.read_bytes()
+            mime, _ = guess_type(path.name, strict=False)
+            mime = mime or "application/octet-stream"
+            gz = gzip_bytes(data) if compressible(mime) else None
+            asset = Asset(
+                mime=mime,
+                tag=f'"{sha256(data).hexdigest()[:32]}"',
+                identity=data,
+                gzip=gz if gz is not None and len(gz) < len(data) else None,
+            )
+            key = PurePosixPath(path.relative_to(root.resolve()).as_posix())
+            assets[key] = asset
+    return assets
+
+
+def send_asset(handler: BaseHTTPRequestHandler, asset: Asset, body: bool) -> None:
+    accept = handler.headers.get("Accept-Encoding", "")
+    encoded = asset.gzip is not None and accepts_gzip(accept)
+    tag = variant_etag(asset.tag, coding="gzip") if encoded else asset.tag
+
+    if not_modified(handler.headers, tag=tag, mtime=None):
+        handler.send_response_only(HTTPStatus.NOT_MODIFIED)
+        handler.send_header("ETag", tag)
+        handler.send_header("Cache-Control", _CACHE_CONTROL)
+        handler.send_header("Vary", _VARY)
+        handler.end_headers()
+    else:
+        data = asset.gzip if encoded and asset.gzip is not None else asset.identity
+        handler.send_response_only(HTTPStatus.OK)
+        handler.send_header("Content-Type", asset.mime)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.send_header("ETag", tag)
+        handler.send_header("Cache-Control", _CACHE_CONTROL)
+        handler.send_header("Vary", _VARY)
+        if encoded:
+            handler.send_header("Content-Encoding", "gzip")
+        handler.end_headers()
+        if body:
+            handler.wfile.write(data)
@@ -1,18 +1,76 @@
 from http import HTTPStatus
 from http.server import CGIHTTPRequestHandler, HTTPServer
 from ipaddress import ip_address
-from pathlib import PurePosixPath
-from typing import Any, Optional
-from urllib.parse import urlsplit
+from os import environ
+from pathlib import Path, PurePosixPath
+from re import compile
+from typing import Any, Mapping, Optional, Sequence, TextIO
+from urllib.parse import parse_qs, urlsplit
 
 from std2.http.server import create_server
 from std2.pathlib import POSIX_ROOT, is_relative_to
 from std2.shutil import hr
 
+from ...httpd import create_pool_server
 from ...log import log
+from ...metrics import AccessLog, InstrumentedHandler, Metrics, is_metrics, send_metrics
+from .assets import Asset, load_assets, send_asset
+from .workers import WorkerPool, dispatch, start_pool
 
 _CGI_BIN = POSIX_ROOT / "cgi-bin"
 _CGI_SCRIPT = _CGI_BIN / "gitweb.cgi"
+_STATIC = _CGI_BIN / "static"
+
+_ACTIONS = frozenset(
+    (
+        "atom",
+        "blame",
+        "blame_data",
+        "blame_incremental",
+        "blob",
+        "blob_plain",
+        "blobdiff",
+        "blobdiff_plain",
+        "commit",
+        "commitdiff",
+        "commitdiff_plain",
+        "forks",
+        "heads",
+        "history",
+        "log",
+        "object",
+        "opml",
+        "patch",
+        "patches",
+        "project_index",
+        "project_list",
+        "remotes",
+        "rss",
+        "search",
+        "search_help",
+        "shortlog",
+        "snapshot",
+        "summary",
+        "tag",
+        "tags",
+        "tree",
+    )
+)
+_OID = compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+_OID_PARAMS = ("h", "hb", "hp", "hpb")
+_IMMUTABLE = frozenset(
+    (
+        "blob",
+        "blob_plain",
+        "blobdiff",
+        "blobdiff_plain",
+        "commit",
+        "commitdiff",
+        "commitdiff_plain",
+        "patch",
+        "tree",
+    )
+)
 
 
 def _path(Handler: CGIHTTPRequestHandler) -> PurePosixPath:
@@ -24,38 +82,123 @@ def _maybe_redirect(handler: CGIHTTPRequestHandler) -> None:
         handler.path = str(POSIX_ROOT)
 
 
-def serve(port: int, promiscuous: bool) -> Optional[HTTPServer]:
+def _query(handler: CGIHTTPRequestHandler) -> Mapping[str, Sequence[str]]:
+    query = urlsplit(handler.path).query.replace(";", "&")
+    return parse_qs(query, keep_blank_values=True)
+
+
+def _route(handler: CGIHTTPRequestHandler) -> str:
+    path = _path(handler)
+    if path == _CGI_SCRIPT:
+        query = _query(handler)
+        action = query.get("a", ("summary" if "p" in query else "project_list",))[-1]
+        return f"gitweb:{action if action in _ACTIONS else 'other'}"
+    elif is_relative_to(path, _STATIC):
+        return "static"
+    else:
+        return "other"
+
+
+def _cache_key(handler: CGIHTTPRequestHandler) -> Optional[Sequence[str]]:
+    if handler.command not in {"GET", "HEAD"} or _path(handler) != _CGI_SCRIPT:
+        return None
+
+    query = _query(handler)
+    action = query.get("a", ("",))[-1]
+    oids = tuple(oid for param in _OID_PARAMS for oid in query.get(param, ()))
+    addressed = "h" in query or "hb" in query
+    if action in _IMMUTABLE and addressed and all(map(_OID.fullmatch, oids)):
+        return (
+            environ.get("GIT_DIR", ""),
+            handler.command,
+            handler.headers.get("Host", ""),
+            handler.headers.get("Accept", ""),
+            *(f"{k}={v}" for k, vals in sorted(query.items()) for v in vals),
+        )
+    else:
+        return None
+
+
+def _dispatch(handler: CGIHTTPRequestHandler, pool: Optional[WorkerPool]) -> bool:
+    if pool and is_relative_to(_path(handler), _CGI_SCRIPT):
+        key = _cache_key(handler)
+        return dispatch(handler, pool=pool, script=_CGI_SCRIPT, key=key)
+    else:
+        return False
+
+
+def serve(
+    port: int,
+    promiscuous: bool,
+    access_log: Optional[TextIO],
+    metrics: bool,
+    workers: int,
+) -> Optional[HTTPServer]:
     bind = ("" if promiscuous else ip_address("::1")), port
+    collected = Metrics()
+    script = Path(_CGI_SCRIPT.relative_to(POSIX_ROOT))
+    pool = start_pool(script, workers=workers)
+    assets = load_assets(Path(_STATIC.relative_to(POSIX_ROOT)))
+
+    class Handler(InstrumentedHandler, CGIHTTPRequestHandler):
+        def route(self) -> str:
+            if is_metrics(self):
+                return super().route()
+            else:
+                return _route(self)
 
-    class Handler(CGIHTTPRequestHandler):
         def is_cgi(self) -> bool:
             if is_relative_to(_path(self), _CGI_SCRIPT):
                 return super().is_cgi()
             else:
                 return False
 
+        def _asset(self) -> Optional[Asset]:
+            path = _path(self)
+            if is_relative_to(path, _STATIC):
+                return assets.get(path.relative_to(_STATIC))
+            else:
+                return None
+
         def do_HEAD(self) -> None:
-            _maybe_redirect(self)
-            return super().do_HEAD()
+            if is_metrics(self):
+                send_metrics(self, metrics=collected, body=False)
+            elif asset := self._asset():
+                send_asset(self, asset=asset, body=False)
+            elif not _dispatch(self, pool=pool):
+                _maybe_redirect(self)
+                super().do_HEAD()
 
         def do_GET(self) -> None:
-            if _path(self) == POSIX_ROOT:
+            if is_metrics(self):
+                send_metrics(self, metrics=collected, body=True)
+            elif asset := self._asset():
+                send_asset(self, asset=asset, body=True)
+            elif _path(self) == POSIX_ROOT:
                 self.send_response_only(HTTPStatus.SEE_OTHER)
                 self.send_header("Location", str(_CGI_SCRIPT))
                 self.end_headers()
-            else:
+            elif not _dispatch(self, pool=pool):
                 _maybe_redirect(self)
                 super().do_GET()
 
         def do_POST(self) -> None:
-            _maybe_redirect(self)
-            super().do_POST()
+            if not _dispatch(self, pool=pool):
+                _maybe_redirect(self)
+                super().do_POST()
 
         def log_message(self, format: str, *args: Any) -> None:
             ...
 
+    Handler.metrics = collected
+    Handler.expose_metrics = metrics
+    Handler.access_log = AccessLog(access_log) if access_log else None
+
     try:
-        httpd = create_server(bind, Handler)
+        if pool:
+            httpd = create_pool_server(bind, handler=Handler, workers=workers)
+        else:
+            httpd = create_server(bind, Handler)
     except OSError as e:
         log.fatal("%s", hr(e))
         return None
@@ -0,0 +1,184 @@
+from contextlib import suppress
+from http import HTTPStatus
+from http.server import CGIHTTPRequestHandler, HTTPServer
+from os import cpu_count
+from pathlib import Path, PurePosixPath
+from queue import SimpleQueue
+from shutil import which
+from subprocess import PIPE, Popen
+from typing import Mapping, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+from ...cache import DiskCache, cache_dir
+
+_WORKER = Path(__file__).resolve(strict=True).parent / "worker.perl"
+_READY = b"ready\n"
+_CACHE = DiskCache(cache_dir("gitweb"), max_bytes=2**28)
+
+WORKERS = min(4, cpu_count() or 1)
+
+
+class _Worker:
+    def __init__(self, argv: Sequence[str]) -> None:
+        self._proc = Popen(argv, stdin=PIPE, stdout=PIPE, stderr=None)
+        self._ready = False
+
+    def ready(self) -> bool:
+        assert self._proc.stdout
+        if not self._ready:
+            self._ready = self._proc.stdout.readline() == _READY
+        return self._ready
+
+    def kill(self) -> None:
+        with suppress(ProcessLookupError):
+            self._proc.kill()
+        self._proc.wait()
+
+    def request(self, env: Mapping[str, str], body: bytes) -> bytes:
+        assert self._proc.stdin and self._proc.stdout
+        if not self.ready():
+            raise EOFError()
+
+        payload = b"\0".join(f"{k}={v}".encode() for k, v in env.items())
+        head = f"{len(payload)} {len(body)}\n".encode()
+        self._proc.stdin.write(head + payload + body)
+        self._proc.stdin.flush()
+
+        if not (line := self._proc.stdout.readline()):
+            raise EOFError()
+        else:
+            size = int(line)
+            data = self._proc.stdout.read(size)
+            if len(data) != size:
+                raise EOFError()
+            else:
+                return data
+
+
+class WorkerPool:
+    def __init__(self, argv: Sequence[str], workers: Sequence[_Worker]) -> None:
+        self._argv = argv
+        self._idle: SimpleQueue[_Worker] = SimpleQueue()
+        for worker in workers:
+            self._idle.put(worker)
+
+    def request(self, env: Mapping[str, str], body: bytes) -> bytes:
+        worker = self._idle.get()
+        try:
+            return worker.request(env, body=body)
+        except (OSError, EOFError, ValueError):
+            worker.kill()
+            worker = _Worker(self._argv)
+            raise
+        finally:
+            self._idle.put(worker)
+
+
+def start_pool(script: Path, workers: int) -> Optional[WorkerPool]:
+    if not workers or not (perl := which("perl")):
+        return None
+    else:
+        argv = (perl, str(_WORKER), str(script.resolve()))
+        spawned = tuple(_Worker(argv) for _ in range(workers))
+        if all(worker.ready() for worker in spawned):
+            return WorkerPool(argv, workers=spawned)
+        else:
+            for worker in spawned:
+                worker.kill()
+            return None
+
+
+def _cgi_env(
+    handler: CGIHTTPRequestHandler, script: PurePosixPath
+) -> Mapping[str, str]:
+    server = handler.server
+    assert isinstance(server, HTTPServer)
+    uri = urlsplit(handler.path)
+    path_info = unquote(uri.path[len(str(script)) :])
+    env = {
+        "SERVER_SOFTWARE": handler.version_string(),
+        "SERVER_NAME": server.server_name,
+        "GATEWAY_INTERFACE": "CGI/1.1",
+        "SERVER_PROTOCOL": handler.protocol_version,
+        "SERVER_PORT": str(server.server_port),
+        "REQUEST_METHOD": handler.command,
+        "PATH_INFO": path_info,
+        "PATH_TRANSLATED": handler.translate_path(path_info),
+        "SCRIPT_NAME": str(script),
+        "QUERY_STRING": uri.query,
+        "REMOTE_ADDR": handler.client_address[0],
+        "REMOTE_HOST": "",
+        "CONTENT_TYPE": handler.headers.get("Content-Type", ""),
+        "CONTENT_LENGTH": handler.headers.get("Content-Length", ""),
+        "HTTP_ACCEPT": ",".join(handler.headers.get_all("Accept", ())),
+        "HTTP_USER_AGENT": handler.headers.get("User-Agent", ""),
+        "HTTP_COOKIE": ", ".join(handler.headers.get_all("Cookie", ())),
+        "HTTP_REFERER": handler.headers.get("Referer", ""),
+    }
+    return env
+
+
+def _send_cgi(handler: CGIHTTPRequestHandler, data: bytes) -> int:
+    if not data:
+        handler.send_error(HTTPStatus.BAD_GATEWAY)
+        return HTTPStatus.BAD_GATEWAY
+
+    crlf, lf = data.find(b"\r\n\r\n"), data.find(b"\n\n")
+    if crlf != -1 and (lf == -1 or crlf < lf):
+        head, body = data[:crlf], data[crlf + 4 :]
+    elif lf != -1:
+        head, body = data[:lf], data[lf + 2 :]
+    else:
+        head, body = data, b""
+
+    status: Optional[int] = None
+    headers: list[tuple[str, str]] = []
+    for line in head.decode("latin-1").splitlines():
+        key, _, val = line.partition(":")
+        if key.strip().lower() == "status":
+            status = int(val.split()[0])
+        elif key.strip():
+            headers.append((key.strip(), val.strip()))
+
+    if status is None:
+        located = any(key.lower() == "location" for key, _ in headers)
+        status = HTTPStatus.FOUND if located else HTTPStatus.OK
+
+    handler.send_response_only(status)
+    for key, val in headers:
+        if key.lower() != "content-length":
+            handler.send_header(key, val)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if handler.command != "HEAD":
+        handler.wfile.write(body)
+    return status
+
+
+def dispatch(
+    handler: CGIHTTPRequestHandler,
+    pool: WorkerPool,
+    script: PurePosixPath,
+    key: Optional[Sequence[str]],
+) -> bool:
+    if key and (cached := _CACHE.get(key)):
+        _send_cgi(handler, data=cached)
+        return True
+
+    env = _cgi_env(handler, script=script)
+    length = int(handler.headers.get("Content-Length") or 0)
+    body = handler.rfile.read(length) if length > 0 else b""
+
+    try:
+        data = pool.request(env, body=body)
+    except (OSError, EOFError, ValueError):
+        if body:
+            handler.send_error(HTTPStatus.BAD_GATEWAY)
+            return True
+        else:
+            return False
+    else:
+        status = _send_cgi(handler, data=data)
+        if key and status == HTTPStatus.OK:
+            _CACHE.put(key, data=data)
+        return True
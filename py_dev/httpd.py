@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BufferedReader
+from ipaddress import IPv4Address, IPv6Address, ip_address
+from math import inf
+from select import select
+from selectors import EVENT_READ, DefaultSelector
+from socket import AF_INET, AF_INET6, IPPROTO_IPV6, IPV6_V6ONLY, socketpair
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, MutableSequence, Type, Union, cast
+
+_LINGER = 0.05
+
+_Bind = tuple[Union[IPv4Address, IPv6Address, str], int]
+
+
+class _Resumable(BaseHTTPRequestHandler):
+    def _buffered(self) -> bool:
+        if not isinstance(rfile := self.rfile, BufferedReader):
+            return False
+        self.connection.settimeout(0)
+        try:
+            return bool(rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def _ready(self) -> bool:
+        if self._buffered():
+            return True
+        else:
+            readable, _, _ = select((self.connection,), (), (), _LINGER)
+            return bool(readable)
+
+    def handle(self) -> None:
+        try:
+            self.close_connection = True
+            self.handle_one_request()
+            while not self.close_connection and self._ready():
+                self.handle_one_request()
+        except BaseException:
+            self.close_connection = True
+            raise
+
+    def finish(self) -> None:
+        if self.close_connection:
+            super().finish()
+
+
+class _PoolServer(HTTPServer):
+    def __init__(
+        self, bind: _Bind, handler: Type[BaseHTTPRequestHandler], workers: int
+    ) -> None:
+        host, port = bind
+        v6 = not host or ip_address(host).version == 6
+        self.address_family = AF_INET6 if v6 else AF_INET
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._idle = DefaultSelector()
+        self._wake, self._waker = socketpair()
+        self._parked: MutableSequence[_Resumable] = []
+        self._lock, self._closed = Lock(), False
+        super().__init__((str(host), port), handler)
+        self._idle.register(self._wake, EVENT_READ)
+        Thread(target=self._watch, daemon=True).start()
+
+    def server_bind(self) -> None:
+        if self.address_family == AF_INET6:
+            with suppress(OSError):
+                self.socket.setsockopt(IPPROTO_IPV6, IPV6_V6ONLY, 0)
+        super().server_bind()
+
+    def _close(self, handler: _Resumable) -> None:
+        handler.close_connection = True
+        with suppress(OSError):
+            handler.finish()
+        self.shutdown_request(handler.request)
+
+    def _park(self, handler: _Resumable) -> None:
+        with self._lock:
+            if not self._closed:
+                self._parked.append(handler)
+                self._waker.send(b"\0")
+                return
+        self._close(handler)
+
+    def _done(self, handler: _Resumable) -> None:
+        if handler.close_connection:
+            self._close(handler)
+        else:
+            self._park(handler)
+
+    def _register(self) -> None:
+        self._wake.recv(2**12)
+        with self._lock:
+            parked, self._parked = self._parked, []
+        for handler in parked:
+            timeout = handler.timeout
+            expires = inf if timeout is None else monotonic() + timeout
+            try:
+                self._idle.register(handler.connection, EVENT_READ, (handler, expires))
+            except (OSError, ValueError):
+                self._close(handler)
+
+    def _watch(self) -> None:
+        while not self._closed:
+            keys = tuple(key for key in self._idle.get_map().values() if key.data)
+            deadline = min((key.data[1] for key in keys), default=inf)
+            timeout = None if deadline == inf else max(0, deadline - monotonic())
+
+            for key, _ in self._idle.select(timeout):
+                if key.fileobj is self._wake:
+                    self._register()
+                else:
+                    self._idle.unregister(key.fileobj)
+                    try:
+                        self._pool.submit(self._resume, key.data[0])
+                    except RuntimeError:
+                        self._close(key.data[0])
+
+            now = monotonic()
+            for key in keys:
+                handler, expires = key.data
+                if expires <= now and self._idle.get_map().get(key.fileobj) is key:
+                    self._idle.unregister(key.fileobj)
+                    self._close(handler)
+
+        for key in tuple(self._idle.get_map().values()):
+            if key.data:
+                self._close(key.data[0])
+        self._idle.close()
+        self._wake.close()
+
+    def _resume(self, handler: _Resumable) -> None:
+        try:
+            handler.handle()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+        finally:
+            self._done(handler)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        try:
+            cls = cast(Type[_Resumable], self.RequestHandlerClass)
+            handler = cls(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+        else:
+            self._done(handler)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self._pool.submit(self._process, request, client_address)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with self._lock:
+            self._closed = True
+            self._waker.send(b"\0")
+            self._waker.close()
+        self._pool.shutdown(wait=False)
+
+
+def create_pool_server(
+    bind: _Bind, handler: Type[BaseHTTPRequestHandler], workers: int
+) -> HTTPServer:
+    resumable = type(handler.__name__, (_Resumable, handler), {})
+    return _PoolServer(bind, handler=resumable, workers=workers)
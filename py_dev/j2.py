@@ -1,6 +1,6 @@
 from os.path import normcase
 from pathlib import PurePath
-from typing import Any, Mapping
+from typing import Any, Iterator, Mapping
 
 from jinja2 import Environment, FileSystemLoader, StrictUndefined
 
@@ -19,3 +19,7 @@ def build(path: PurePath, *paths: PurePath) -> Environment:
 def render(j2: Environment, path: PurePath, env: Mapping[str, Any]) -> str:
     text = j2.get_template(normcase(path)).render(env)
     return text
+
+
+def generate(j2: Environment, path: PurePath, env: Mapping[str, Any]) -> Iterator[str]:
+    return j2.get_template(normcase(path)).generate(env)
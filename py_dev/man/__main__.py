@@ -12,13 +12,14 @@ from std2.shutil import hr
 
 from ..log import log
 from ..run import run_main
-from ..srv.serve import serve
+from ..srv.serve import WORKERS, serve
 
 
 def _parse_args() -> Namespace:
     parser = ArgumentParser()
     parser.add_argument("-p", "--port", type=int, default=0)
     parser.add_argument("-o", "--open", action="store_true")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
     parser.add_argument("programs", nargs="+")
     return parser.parse_args()
 
@@ -69,7 +70,14 @@ async def _main() -> int:
             head, *rest = htmls
             web_path = "" if rest else quote(normcase(head))
 
-            if httpd := serve(root, port=args.port, promiscuous=args.open):
+            if httpd := serve(
+                root,
+                port=args.port,
+                promiscuous=args.open,
+                workers=args.workers,
+                access_log=None,
+                metrics=False,
+            ):
                 host = httpd.server_name if args.open else "localhost"
                 location = f"http://{host}:{httpd.server_port}/{web_path}"
                 w_open(location)
@@ -0,0 +1,227 @@
+from bisect import bisect_left
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.message import Message
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from io import BufferedIOBase
+from json import dumps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Iterator, MutableMapping, Optional, TextIO
+from urllib.parse import urlsplit
+
+METRICS_PATH = "/metrics"
+
+_PREFIX = "py_dev_http"
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_QUANTILES = (0.5, 0.95, 0.99)
+_RESERVOIR = 2**10
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class _Route:
+    statuses: Counter[int] = field(default_factory=Counter)
+    sent: int = 0
+    seconds: float = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(_BUCKETS))
+    samples: deque[float] = field(default_factory=lambda: deque(maxlen=_RESERVOIR))
+
+
+def _label(val: str) -> str:
+    escaped = val.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    else:
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._routes: MutableMapping[str, _Route] = {}
+
+    def observe(self, route: str, status: int, sent: int, seconds: float) -> None:
+        with self._lock:
+            r = self._routes.setdefault(route, _Route())
+            r.statuses[status] += 1
+            r.sent += sent
+            r.seconds += seconds
+            if (idx := bisect_left(_BUCKETS, seconds)) < len(_BUCKETS):
+                r.buckets[idx] += 1
+            r.samples.append(seconds)
+
+    def _lines(self) -> Iterator[str]:
+        with self._lock:
+            routes = {
+                name: (
+                    {**r.statuses},
+                    r.sent,
+                    r.seconds,
+                    [*r.buckets],
+                    sorted(r.samples),
+                )
+                for name, r in sorted(self._routes.items())
+            }
+
+        yield f"# HELP {_PREFIX}_requests_total Requests handled."
+        yield f"# TYPE {_PREFIX}_requests_total counter"
+        for name, (statuses, *_) in routes.items():
+            for status, count in sorted(statuses.items()):
+                labels = f'route={_label(name)},status="{status}"'
+                yield f"{_PREFIX}_requests_total{{{labels}}} {count}"
+
+        yield f"# HELP {_PREFIX}_response_bytes_total Bytes written to clients."
+        yield f"# TYPE {_PREFIX}_response_bytes_total counter"
+        for name, (_, sent, *_) in routes.items():
+            yield f"{_PREFIX}_response_bytes_total{{route={_label(name)}}} {sent}"
+
+        metric = f"{_PREFIX}_request_duration_seconds"
+        yield f"# HELP {metric} Request latency."
+        yield f"# TYPE {metric} histogram"
+        for name, (statuses, _, seconds, buckets, _) in routes.items():
+            route = f"route={_label(name)}"
+            total = sum(statuses.values())
+            acc = 0
+            for le, count in zip(_BUCKETS, buckets):
+                acc += count
+                yield f'{metric}_bucket{{{route},le="{le}"}} {acc}'
+            yield f'{metric}_bucket{{{route},le="+Inf"}} {total}'
+            yield f"{metric}_sum{{{route}}} {seconds}"
+            yield f"{metric}_count{{{route}}} {total}"
+
+        metric = f"{_PREFIX}_request_latency_seconds"
+        yield f"# HELP {metric} Latency of the last {_RESERVOIR} requests."
+        yield f"# TYPE {metric} summary"
+        for name, (statuses, _, seconds, _, samples) in routes.items():
+            route = f"route={_label(name)}"
+            for q in _QUANTILES:
+                val = _quantile(samples, q=q)
+                yield f'{metric}{{{route},quantile="{q}"}} {val}'
+            yield f"{metric}_sum{{{route}}} {seconds}"
+            yield f"{metric}_count{{{route}}} {sum(statuses.values())}"
+
+    def render(self) -> bytes:
+        return "".join(f"{line}\n" for line in self._lines()).encode()
+
+
+class AccessLog:
+    def __init__(self, stream: TextIO) -> None:
+        self._lock = Lock()
+        self._stream = stream
+
+    def write(self, record: Any) -> None:
+        line = dumps(record, check_circular=False, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+class _Counting(BufferedIOBase):
+    def __init__(self, raw: BufferedIOBase) -> None:
+        super().__init__()
+        self._raw = raw
+        self.sent = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        n = self._raw.write(b)
+        self.sent += n
+        return n
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def close(self) -> None:
+        super().close()
+        self._raw.close()
+
+
+def count_sent(handler: BaseHTTPRequestHandler, sent: int) -> None:
+    if isinstance(wfile := handler.wfile, _Counting):
+        wfile.sent += sent
+
+
+def is_metrics(handler: "InstrumentedHandler") -> bool:
+    return handler.expose_metrics and urlsplit(handler.path).path == METRICS_PATH
+
+
+def send_metrics(handler: BaseHTTPRequestHandler, metrics: Metrics, body: bool) -> None:
+    text = metrics.render()
+    handler.send_response_only(HTTPStatus.OK)
+    handler.send_header("Content-Type", _CONTENT_TYPE)
+    handler.send_header("Content-Length", str(len(text)))
+    handler.end_headers()
+    if body:
+        handler.wfile.write(text)
+
+
+class InstrumentedHandler(BaseHTTPRequestHandler):
+    metrics: Metrics
+    expose_metrics = False
+    access_log: Optional[AccessLog] = None
+
+    _status: Optional[int] = None
+    _started: Optional[float] = None
+    _sent = 0
+
+    def route(self) -> str:
+        return "metrics" if is_metrics(self) else "other"
+
+    def setup(self) -> None:
+        super().setup()
+        self.wfile = _Counting(self.wfile)
+
+    def parse_request(self) -> bool:
+        self._started = perf_counter()
+        return super().parse_request()
+
+    def send_response_only(self, code: int, message: Optional[str] = None) -> None:
+        self._status = code
+        super().send_response_only(code, message)
+
+    def _record(self, status: int, started: float) -> None:
+        assert isinstance(self.wfile, _Counting)
+        elapsed = perf_counter() - started
+        sent = self.wfile.sent - self._sent
+        route = self.route()
+        self.metrics.observe(route, status=status, sent=sent, seconds=elapsed)
+
+        if self.access_log:
+            record = {
+                "time": datetime.now(tz=timezone.utc).isoformat(),
+                "client": self.client_address[0],
+                "method": self.command,
+                "path": self.path,
+                "route": route,
+                "status": status,
+                "bytes": sent,
+                "duration_ms": round(elapsed * 1000, 3),
+                "user_agent": self.headers.get("User-Agent"),
+            }
+            self.access_log.write(record)
+
+    def _reset(self) -> None:
+        assert isinstance(self.wfile, _Counting)
+        self._status, self._started, self._sent = None, None, self.wfile.sent
+        self.command, self.path, self.headers = "", "", Message()
+
+    def handle_one_request(self) -> None:
+        self._reset()
+        try:
+            super().handle_one_request()
+        finally:
+            if self._status is not None:
+                started = self._started or perf_counter()
+                self._record(int(self._status), started=started)
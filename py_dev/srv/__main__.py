@@ -1,4 +1,4 @@
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, FileType, Namespace
 from pathlib import Path, PurePath
 from typing import NoReturn
 from webbrowser import open as w_open
@@ -7,7 +7,7 @@ from std2.shutil import hr
 
 from ..log import log
 from ..run import run_main
-from .serve import serve
+from .serve import WORKERS, serve
 
 
 def _parse_args() -> Namespace:
@@ -15,13 +15,23 @@ def _parse_args() -> Namespace:
     parser.add_argument("root", nargs="?", type=PurePath, default=Path.cwd())
     parser.add_argument("-p", "--port", type=int, default=0)
     parser.add_argument("-o", "--open", action="store_true")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--access-log", type=FileType("a"))
+    parser.add_argument("--metrics", action="store_true")
     return parser.parse_args()
 
 
 async def _main() -> int:
     args = _parse_args()
 
-    if httpd := serve(args.root, port=args.port, promiscuous=args.open):
+    if httpd := serve(
+        args.root,
+        port=args.port,
+        promiscuous=args.open,
+        workers=args.workers,
+        access_log=args.access_log,
+        metrics=args.metrics,
+    ):
         host = httpd.server_name if args.open else "localhost"
         location = f"http://{host}:{httpd.server_port}"
         w_open(location)
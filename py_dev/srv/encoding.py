@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+from gzip import GzipFile, compress
+from io import BufferedReader
+from os import fstat
+from pathlib import Path
+from shutil import copyfileobj
+from stat import S_ISREG
+from typing import (
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from zlib import MAX_WBITS, compressobj
+
+from ..cache import DiskCache, cache_dir
+
+GZIP = "gzip"
+_SIBLINGS = (("br", ".br"), ("zstd", ".zst"), (GZIP, ".gz"))
+
+_MIN_SIZE = 2**10
+_BUF_SIZE = 2**20
+_CACHE = DiskCache(cache_dir("srv", GZIP), max_bytes=2**30)
+_MAX_SIZE = _CACHE.max_bytes // 8
+
+_MIMES = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+_MIME_SUFFIXES = ("+json", "+xml")
+
+
+class Encoded(NamedTuple):
+    coding: str
+    fp: Optional[BufferedReader]
+    size: Optional[int]
+
+
+def _accepted(header: str) -> Mapping[str, float]:
+    acc: dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            key, _, val = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        if coding := coding.strip().lower():
+            acc[coding] = q
+    return acc
+
+
+def codings(header: str) -> Sequence[str]:
+    accepted = _accepted(header)
+    wildcard = accepted.get("*", 0.0)
+    ranked = sorted(
+        (accepted.get(coding, wildcard), -idx, coding)
+        for idx, (coding, _) in enumerate(_SIBLINGS)
+    )
+    return tuple(coding for q, _, coding in reversed(ranked) if q > 0)
+
+
+def compressible(mime: Optional[str]) -> bool:
+    return mime is not None and (
+        mime.startswith("text/") or mime in _MIMES or mime.endswith(_MIME_SUFFIXES)
+    )
+
+
+def accepts_gzip(accept: str) -> bool:
+    return GZIP in codings(accept)
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    return compress(data, mtime=0)
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    gz = compressobj(wbits=MAX_WBITS | 16)
+    for chunk in chunks:
+        yield gz.compress(chunk)
+    yield gz.flush()
+
+
+def _open(coding: str, path: Path) -> Optional[Encoded]:
+    try:
+        fp = path.open("rb")
+    except OSError:
+        return None
+    else:
+        return Encoded(coding=coding, fp=fp, size=fstat(fp.fileno()).st_size)
+
+
+def _sibling(
+    path: Path, coding: str, suffix: str, mtime: datetime
+) -> Optional[Encoded]:
+    sibling = path.with_name(path.name + suffix)
+    try:
+        stat = sibling.lstat()
+    except OSError:
+        return None
+    else:
+        fresh = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc) >= mtime
+        if S_ISREG(stat.st_mode) and fresh:
+            return _open(coding, path=sibling)
+        else:
+            return None
+
+
+def _gzip(path: Path, size: int, mtime: datetime, compress: bool) -> Optional[Encoded]:
+    def write(fp: BinaryIO) -> None:
+        with path.open("rb") as src, GzipFile(
+            filename="", fileobj=fp, mode="wb", mtime=0
+        ) as gz:
+            copyfileobj(src, gz, _BUF_SIZE)
+
+    key = ("v2", str(path), mtime.isoformat(), str(size))
+    if (cached := _CACHE.lookup(key)) and (encoded := _open(GZIP, path=cached)):
+        return encoded
+    elif not compress:
+        return Encoded(coding=GZIP, fp=None, size=None)
+    elif stored := _CACHE.store(key, write=write):
+        return _open(GZIP, path=stored)
+    else:
+        return None
+
+
+def negotiate(
+    accept: str,
+    path: Path,
+    mime: Optional[str],
+    size: int,
+    mtime: datetime,
+    compress: bool,
+) -> Optional[Encoded]:
+    suffixes = dict(_SIBLINGS)
+    for coding in codings(accept):
+        if encoded := _sibling(path, coding, suffix=suffixes[coding], mtime=mtime):
+            return encoded
+        elif (
+            coding == GZIP
+            and compressible(mime)
+            and _MIN_SIZE <= size <= _MAX_SIZE
+            and (encoded := _gzip(path, size=size, mtime=mtime, compress=compress))
+        ):
+            return encoded
+    return None
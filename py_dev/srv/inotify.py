@@ -0,0 +1,113 @@
+from ctypes import CDLL, c_char_p, c_int, c_uint32, get_errno
+from ctypes.util import find_library
+from os import fsencode, read, strerror
+from pathlib import Path
+from struct import Struct
+from sys import platform
+from threading import Lock, Thread
+from typing import Callable, Iterator, MutableMapping, Optional
+
+_IN_CLOEXEC = 0o2000000
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+
+_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+
+_EVENT = Struct("iIII")
+_BUF_SIZE = 2**16
+
+
+def _events(buf: bytes) -> Iterator[tuple[int, int]]:
+    offset = 0
+    while offset < len(buf):
+        wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+        offset += _EVENT.size + length
+        yield wd, mask
+
+
+class Inotify:
+    def __init__(self, libc: CDLL, on_change: Callable[[Optional[Path]], None]) -> None:
+        self._libc, self._on_change = libc, on_change
+        self._lock = Lock()
+        self._paths: MutableMapping[int, Path] = {}
+        self._wds: MutableMapping[Path, int] = {}
+
+        if (fd := libc.inotify_init1(_IN_CLOEXEC)) < 0:
+            errno = get_errno()
+            raise OSError(errno, strerror(errno))
+        else:
+            self._fd = fd
+            Thread(target=self._loop, daemon=True).start()
+
+    def watch(self, path: Path) -> bool:
+        with self._lock:
+            if path in self._wds:
+                return True
+            elif (
+                wd := self._libc.inotify_add_watch(self._fd, fsencode(path), _MASK)
+            ) < 0:
+                return False
+            else:
+                self._wds[path], self._paths[wd] = wd, path
+                return True
+
+    def unwatch(self, path: Path) -> None:
+        with self._lock:
+            if (wd := self._wds.pop(path, None)) is not None:
+                self._paths.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                buf = read(self._fd, _BUF_SIZE)
+            except OSError:
+                return
+            else:
+                for wd, mask in _events(buf):
+                    if mask & _IN_Q_OVERFLOW:
+                        self._on_change(None)
+                    else:
+                        with self._lock:
+                            path = self._paths.get(wd)
+                            if path and mask & _IN_IGNORED:
+                                self._paths.pop(wd, None)
+                                self._wds.pop(path, None)
+                        if path:
+                            self._on_change(path)
+
+
+def inotify(on_change: Callable[[Optional[Path]], None]) -> Optional[Inotify]:
+    if platform != "linux":
+        return None
+    else:
+        try:
+            libc = CDLL(find_library("c"), use_errno=True)
+            libc.inotify_init1.argtypes = (c_int,)
+            libc.inotify_add_watch.argtypes = (c_int, c_char_p, c_uint32)
+            libc.inotify_rm_watch.argtypes = (c_int, c_int)
+            return Inotify(libc, on_change=on_change)
+        except (AttributeError, OSError):
+            return None
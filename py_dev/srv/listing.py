@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from os import stat_result
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Callable, Generic, MutableMapping, Optional, TypeVar
+
+from .inotify import Inotify, inotify
+
+_T = TypeVar("_T")
+
+_TTL = 5.0
+
+
+@dataclass(frozen=True)
+class _Entry(Generic[_T]):
+    value: _T
+    version: int
+    mtime_ns: int
+    at: float
+    watched: bool
+
+
+class Listings(Generic[_T]):
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._lock = Lock()
+        self._entries: OrderedDict[Path, _Entry[_T]] = OrderedDict()
+        self._versions: MutableMapping[Path, int] = {}
+        self._inotify: Optional[Inotify] = None
+        self._init = False
+
+    def _invalidate(self, path: Optional[Path]) -> None:
+        with self._lock:
+            for p in self._versions if path is None else (path,):
+                if p in self._versions:
+                    self._versions[p] += 1
+
+    def _fresh(self, path: Path, entry: _Entry[_T], stat: stat_result) -> bool:
+        if entry.mtime_ns != stat.st_mtime_ns:
+            return False
+        elif entry.watched:
+            return entry.version == self._versions.get(path)
+        else:
+            return monotonic() - entry.at < _TTL
+
+    def get(self, path: Path, stat: stat_result, scan: Callable[[], _T]) -> _T:
+        with self._lock:
+            if not self._init:
+                self._init = True
+                self._inotify = inotify(self._invalidate)
+
+            if (entry := self._entries.get(path)) and self._fresh(
+                path, entry=entry, stat=stat
+            ):
+                self._entries.move_to_end(path)
+                return entry.value
+            else:
+                watched = bool(self._inotify and self._inotify.watch(path))
+                version = self._versions.setdefault(path, 0)
+
+        at = monotonic()
+        value = scan()
+
+        with self._lock:
+            self._entries[path] = _Entry(
+                value=value,
+                version=version,
+                mtime_ns=stat.st_mtime_ns,
+                at=at,
+                watched=watched,
+            )
+            self._entries.move_to_end(path)
+
+            while len(self._entries) > self._size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._versions.pop(evicted, None)
+                if self._inotify:
+                    self._inotify.unwatch(evicted)
+
+        return value
@@ -0,0 +1,71 @@
+from typing import Iterator, Optional, Sequence
+
+_UNIT = "bytes"
+_MAX_RANGES = 16
+
+Range = tuple[int, int]
+
+
+def _int(digits: str) -> int:
+    if digits.isascii() and digits.isdigit():
+        return int(digits)
+    else:
+        raise ValueError(digits)
+
+
+def _parse_spec(spec: str, size: int) -> Optional[Range]:
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        raise ValueError(spec)
+    elif not first:
+        suffix = _int(last)
+        if suffix <= 0 or size <= 0:
+            return None
+        else:
+            return max(0, size - suffix), size
+    else:
+        start = _int(first)
+        stop = _int(last) + 1 if last else max(size, start + 1)
+        if stop <= start:
+            raise ValueError(spec)
+        elif start >= size:
+            return None
+        else:
+            return start, min(stop, size)
+
+
+def _coalesce(ranges: Sequence[Range]) -> Iterator[Range]:
+    it = iter(sorted(ranges))
+    if cur := next(it, None):
+        lo, hi = cur
+        for start, stop in it:
+            if start <= hi:
+                hi = max(hi, stop)
+            else:
+                yield lo, hi
+                lo, hi = start, stop
+        yield lo, hi
+
+
+def parse_ranges(header: str, size: int) -> Optional[Sequence[Range]]:
+    unit, sep, specs = header.partition("=")
+    if not sep or unit.strip().lower() != _UNIT:
+        return None
+    else:
+        try:
+            parsed = tuple(_parse_spec(spec, size=size) for spec in specs.split(","))
+        except ValueError:
+            return None
+        else:
+            if len(parsed) > _MAX_RANGES:
+                return None
+            else:
+                return tuple(_coalesce(tuple(r for r in parsed if r)))
+
+
+def content_range(rng: Optional[Range], size: int) -> str:
+    if rng:
+        start, stop = rng
+        return f"{_UNIT} {start}-{stop - 1}/{size}"
+    else:
+        return f"{_UNIT} */{size}"
@@ -1,30 +1,71 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import HTTPServer
 from ipaddress import ip_address
+from os import cpu_count
 from pathlib import Path, PurePath
-from typing import Optional
+from typing import Optional, TextIO
+from urllib.parse import urlsplit
 
 from std2.http.server import create_server
 from std2.shutil import hr
 
+from ..httpd import create_pool_server
 from ..log import log
+from ..metrics import AccessLog, InstrumentedHandler, Metrics, is_metrics, send_metrics
 from .static import build_j2, get, head
 
+_KEEP_ALIVE = 15
 
-def serve(root: PurePath, port: int, promiscuous: bool) -> Optional[HTTPServer]:
+WORKERS = min(32, (cpu_count() or 1) + 4)
+
+
+def serve(
+    root: PurePath,
+    port: int,
+    promiscuous: bool,
+    workers: int,
+    access_log: Optional[TextIO],
+    metrics: bool,
+) -> Optional[HTTPServer]:
     bind = ("" if promiscuous else ip_address("::1")), port
     j2 = build_j2()
+    collected = Metrics()
 
     try:
         resolved = Path(root).resolve(strict=True)
 
-        class Handler(BaseHTTPRequestHandler):
+        class Handler(InstrumentedHandler):
+            protocol_version = "HTTP/1.1" if workers else "HTTP/1.0"
+            timeout = _KEEP_ALIVE
+            disable_nagle_algorithm = True
+
+            def route(self) -> str:
+                if is_metrics(self):
+                    return super().route()
+                elif urlsplit(self.path).path.endswith("/"):
+                    return "index"
+                else:
+                    return "file"
+
             def do_HEAD(self) -> None:
-                head(j2, handler=self, root=resolved)
+                if is_metrics(self):
+                    send_metrics(self, metrics=collected, body=False)
+                else:
+                    head(j2, handler=self, root=resolved)
 
             def do_GET(self) -> None:
-                get(j2, handler=self, root=resolved)
+                if is_metrics(self):
+                    send_metrics(self, metrics=collected, body=True)
+                else:
+                    get(j2, handler=self, root=resolved)
+
+        Handler.metrics = collected
+        Handler.expose_metrics = metrics
+        Handler.access_log = AccessLog(access_log) if access_log else None
 
-        httpd = create_server(bind, Handler)
+        if workers:
+            httpd = create_pool_server(bind, handler=Handler, workers=workers)
+        else:
+            httpd = create_server(bind, Handler)
     except OSError as e:
         log.fatal("%s", hr(e))
         return None
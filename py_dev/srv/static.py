@@ -1,72 +1,182 @@
-from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext, suppress
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import format_datetime
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler
+from io import BufferedReader
+from itertools import chain
+from json import dumps
 from locale import strxfrm
 from mimetypes import guess_type
-from os import scandir, sep, stat_result
-from os.path import normcase
+from os import DirEntry, scandir, sep, stat_result
+from os.path import normcase, splitext
 from pathlib import Path, PurePath, PurePosixPath
-from shutil import copyfileobj
+from secrets import token_hex
+from socket import socket
 from stat import S_ISDIR
-from typing import Any, Iterator, Optional, Sequence, Union, cast
-from urllib.parse import unquote, urlsplit
+from sys import platform
+from typing import (
+    Iterator,
+    MutableMapping,
+    MutableSequence,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
 
 from jinja2 import Environment
 from std2.datetime import utc_to_local
 from std2.locale import si_prefixed
 from std2.pathlib import POSIX_ROOT, is_relative_to
 
-from ..j2 import build, render
+from ..j2 import build, generate
+from ..metrics import count_sent
+from .encoding import (
+    GZIP,
+    Encoded,
+    accepts_gzip,
+    gzip_bytes,
+    gzip_chunks,
+    negotiate,
+)
+from .listing import Listings
+from .ranges import Range, content_range, parse_ranges
+from .validators import (
+    etag,
+    not_modified,
+    strong_match,
+    variant_etag,
+    weak_etag,
+)
 
 _TEMPLATES = Path(__file__).resolve(strict=True).parent / "templates"
 _INDEX = PurePath("index.html")
 
+_BUF_SIZE = 2**20
+_VARY = "Accept-Encoding"
+_STREAM_ROWS = 2**10
+_BATCH_SIZE = 2**16
 
-@dataclass(frozen=True)
-class _Fd:
-    path: Path
-    sortby: tuple[bool, str, str]
-    rel_path: PurePath
-    name: str
-    mime: Optional[str]
+_CACHED_STAT = platform == "win32"
+_STAT_CHUNK = 2**8
+_STAT_POOL = ThreadPoolExecutor(max_workers=16)
+
+
+class _Fd(NamedTuple):
+    file: str
+    base: str
+    mode: int
+    ino: int
     size: int
-    mtime: datetime
+    mtime_ns: int
 
+    @property
+    def path(self) -> Path:
+        return Path(self.file)
 
-def _fd(root: PurePath, path: Path, stat: stat_result) -> _Fd:
-    is_dir = S_ISDIR(stat.st_mode)
-    sortby = (
-        not is_dir,
-        "" if is_dir else strxfrm(path.suffix),
-        strxfrm(path.stem),
-    )
-    rel_path = PurePath(normcase(path.relative_to(root)))
-    name = path.name + sep if is_dir else path.name
+    @property
+    def is_dir(self) -> bool:
+        return S_ISDIR(self.mode)
+
+    @property
+    def name(self) -> str:
+        return self.base + sep if self.is_dir else self.base
+
+    @property
+    def mime(self) -> Optional[str]:
+        if self.is_dir:
+            return None
+        else:
+            mime, _ = guess_type(self.base, strict=False)
+            return mime
+
+    @property
+    def mtime(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime_ns / 10**9, tz=timezone.utc)
+
+    @property
+    def etag(self) -> str:
+        return etag(self.ino, size=self.size, mtime_ns=self.mtime_ns)
 
-    if is_dir:
-        mime = None
-    else:
-        mime, _ = guess_type(path, strict=False)
 
-    mtime = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+def _fd(file: str, base: str, stat: stat_result) -> _Fd:
     fd = _Fd(
-        path=path,
-        sortby=sortby,
-        rel_path=rel_path,
-        name=name,
-        mime=mime,
+        file=file,
+        base=base,
+        mode=stat.st_mode,
+        ino=stat.st_ino,
         size=stat.st_size,
-        mtime=mtime,
+        mtime_ns=stat.st_mtime_ns,
     )
     return fd
 
 
+def _stat(scans: Sequence[DirEntry[str]]) -> Sequence[_Fd]:
+    acc = []
+    for scan in scans:
+        with suppress(OSError):
+            stat = scan.stat()
+            acc.append(_fd(scan.path, base=scan.name, stat=stat))
+    return acc
+
+
+def _scan(path: Path) -> Iterator[_Fd]:
+    try:
+        with scandir(path) as it:
+            scans = tuple(it)
+    except OSError:
+        return
+    else:
+        if _CACHED_STAT or len(scans) <= _STAT_CHUNK:
+            yield from _stat(scans)
+        else:
+            chunks = (
+                scans[i : i + _STAT_CHUNK] for i in range(0, len(scans), _STAT_CHUNK)
+            )
+            yield from chain.from_iterable(_STAT_POOL.map(_stat, chunks))
+
+
+def _sortby(fd: _Fd) -> tuple[bool, str, str]:
+    if fd.is_dir:
+        return False, "", strxfrm(fd.base)
+    else:
+        stem, ext = splitext(fd.base)
+        return True, strxfrm(ext), strxfrm(stem)
+
+
+def _index_etag(rel_path: PurePath, fd: _Fd, fds: Sequence[_Fd]) -> str:
+    head = f"{rel_path}\0{fd.etag}"
+    return weak_etag((head, *(f"{f.base}\0{f.etag}" for f in fds)))
+
+
+@dataclass(frozen=True)
+class _Listing:
+    rel_path: PurePath
+    fds: Sequence[_Fd]
+    tag: str
+    rendered: MutableMapping[Optional[str], bytes]
+
+
+_LISTINGS: Listings[_Listing] = Listings(size=64)
+
+
+@dataclass(frozen=True)
+class _View:
+    offset: int
+    limit: Optional[int]
+    json: bool
+
+
+_DEFAULT_VIEW = _View(offset=0, limit=None, json=False)
+
+
 def _seek(
     handler: BaseHTTPRequestHandler, prefix: PurePosixPath, root: Path
-) -> Union[_Fd, tuple[_Fd, ...], None]:
+) -> Union[_Fd, _Listing, None]:
     uri = urlsplit(handler.path)
     raw = normcase(unquote(uri.path))
     try:
@@ -82,39 +192,239 @@ def _seek(
         else:
             if not is_relative_to(asset, root):
                 return None
+            elif not S_ISDIR(stat.st_mode):
+                return _fd(str(asset), base=asset.name, stat=stat)
             else:
-                fd = _fd(root, path=asset, stat=stat)
 
-                if not S_ISDIR(stat.st_mode):
-                    return fd
-                else:
+                def listing() -> _Listing:
+                    rel_path = PurePath(normcase(asset.relative_to(root)))
+                    fd = _fd(str(asset), base=asset.name, stat=stat)
+                    fds = tuple(sorted(_scan(asset), key=_sortby))
+                    tag = _index_etag(rel_path, fd=fd, fds=fds)
+                    return _Listing(rel_path=rel_path, fds=fds, tag=tag, rendered={})
 
-                    def cont() -> Iterator[_Fd]:
-                        with suppress(OSError):
-                            for scan in scandir(asset):
-                                with suppress(OSError):
-                                    stat = scan.stat()
-                                    fd = _fd(root, path=Path(scan), stat=stat)
-                                    yield fd
+                return _LISTINGS.get(asset, stat=stat, scan=listing)
 
-                    return (fd, *sorted(cont(), key=lambda f: f.sortby))
 
+def _send_not_found(handler: BaseHTTPRequestHandler) -> None:
+    handler.send_response_only(HTTPStatus.NOT_FOUND)
+    handler.send_header("Content-Length", str(0))
+    handler.end_headers()
 
-def _send_headers(handler: BaseHTTPRequestHandler, fd: _Fd) -> None:
-    mimetype = fd.mime or "application/octet-stream"
-    last_mod = format_datetime(fd.mtime, usegmt=True)
 
-    handler.send_response_only(HTTPStatus.OK)
-    handler.send_header("Content-Type", value=mimetype)
-    handler.send_header("Content-Length", str(fd.size))
-    handler.send_header("Last-Modified", last_mod)
+def _ranges(handler: BaseHTTPRequestHandler, fd: _Fd) -> Optional[Sequence[Range]]:
+    if not (header := handler.headers.get("Range")):
+        return None
+    elif (if_range := handler.headers.get("If-Range")) and not (
+        strong_match(if_range, tag=fd.etag)
+        or if_range.strip() == format_datetime(fd.mtime, usegmt=True)
+    ):
+        return None
+    else:
+        return parse_ranges(header, size=fd.size)
+
+
+def _encoded(handler: BaseHTTPRequestHandler, fd: _Fd, body: bool) -> Optional[Encoded]:
+    if handler.headers.get("Range") or not (
+        accept := handler.headers.get("Accept-Encoding")
+    ):
+        return None
+    else:
+        return negotiate(
+            accept,
+            path=fd.path,
+            mime=fd.mime,
+            size=fd.size,
+            mtime=fd.mtime,
+            compress=body,
+        )
+
+
+def _send_headers(
+    handler: BaseHTTPRequestHandler,
+    status: HTTPStatus,
+    fd: _Fd,
+    tag: str,
+    length: Optional[int],
+) -> None:
+    handler.send_response_only(status)
+    handler.send_header("Accept-Ranges", "bytes")
+    if length is not None:
+        handler.send_header("Content-Length", str(length))
+    handler.send_header("Last-Modified", format_datetime(fd.mtime, usegmt=True))
+    handler.send_header("ETag", tag)
+    handler.send_header("Vary", _VARY)
+
+
+def _send_not_modified(
+    handler: BaseHTTPRequestHandler, tag: str, mtime: Optional[datetime]
+) -> None:
+    handler.send_response_only(HTTPStatus.NOT_MODIFIED)
+    handler.send_header("ETag", tag)
+    handler.send_header("Vary", _VARY)
+    if mtime:
+        handler.send_header("Last-Modified", format_datetime(mtime, usegmt=True))
     handler.end_headers()
 
 
-def _index(j2: Environment, fd: tuple[_Fd, ...]) -> bytes:
-    index, *fds = fd
+def _parts(
+    fd: _Fd, ranges: Sequence[Range], boundary: str
+) -> tuple[Sequence[tuple[bytes, Range]], bytes]:
+    mimetype = fd.mime or "application/octet-stream"
+    parts = tuple(
+        (
+            (
+                f"\r\n--{boundary}\r\n"
+                f"Content-Type: {mimetype}\r\n"
+                f"Content-Range: {content_range(rng, size=fd.size)}\r\n\r\n"
+            ).encode(),
+            rng,
+        )
+        for rng in ranges
+    )
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return parts, tail
+
+
+def _send_file(handler: BaseHTTPRequestHandler, fd: _Fd, body: bool) -> None:
+    mimetype = fd.mime or "application/octet-stream"
+    encoded = _encoded(handler, fd=fd, body=body)
+    tag = variant_etag(fd.etag, coding=encoded.coding) if encoded else fd.etag
+    ranges = _ranges(handler, fd=fd) if body and not encoded else None
+
+    if not_modified(handler.headers, tag=tag, mtime=fd.mtime):
+        if encoded and encoded.fp:
+            encoded.fp.close()
+        _send_not_modified(handler, tag=tag, mtime=fd.mtime)
+
+    elif encoded:
+        with encoded.fp or nullcontext():
+            _send_headers(
+                handler, status=HTTPStatus.OK, fd=fd, tag=tag, length=encoded.size
+            )
+            handler.send_header("Content-Type", mimetype)
+            handler.send_header("Content-Encoding", encoded.coding)
+            handler.end_headers()
+            if body and encoded.fp and encoded.size is not None:
+                with suppress(ConnectionError):
+                    _send_body(handler, fp=encoded.fp, offset=0, count=encoded.size)
+
+    elif ranges is None:
+        _send_headers(handler, status=HTTPStatus.OK, fd=fd, tag=tag, length=fd.size)
+        handler.send_header("Content-Type", mimetype)
+        handler.end_headers()
+        if body:
+            with fd.path.open("rb") as fp, suppress(ConnectionError):
+                _send_body(handler, fp=fp, offset=0, count=fd.size)
+
+    elif not ranges:
+        handler.send_response_only(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        handler.send_header("Content-Range", content_range(None, size=fd.size))
+        handler.send_header("Content-Length", str(0))
+        handler.end_headers()
+
+    elif len(ranges) == 1:
+        (rng,) = ranges
+        start, stop = rng
+        _send_headers(
+            handler,
+            status=HTTPStatus.PARTIAL_CONTENT,
+            fd=fd,
+            tag=tag,
+            length=stop - start,
+        )
+        handler.send_header("Content-Type", mimetype)
+        handler.send_header("Content-Range", content_range(rng, size=fd.size))
+        handler.end_headers()
+        with fd.path.open("rb") as fp, suppress(ConnectionError):
+            _send_body(handler, fp=fp, offset=start, count=stop - start)
+
+    else:
+        boundary = token_hex(16)
+        parts, tail = _parts(fd, ranges=ranges, boundary=boundary)
+        length = sum(len(head) + stop - start for head, (start, stop) in parts)
+        _send_headers(
+            handler,
+            status=HTTPStatus.PARTIAL_CONTENT,
+            fd=fd,
+            tag=tag,
+            length=length + len(tail),
+        )
+        handler.send_header(
+            "Content-Type", f"multipart/byteranges; boundary={boundary}"
+        )
+        handler.end_headers()
+        with fd.path.open("rb") as fp, suppress(ConnectionError):
+            for head, (start, stop) in parts:
+                handler.wfile.write(head)
+                _send_body(handler, fp=fp, offset=start, count=stop - start)
+            handler.wfile.write(tail)
+
+
+def _send_body(
+    handler: BaseHTTPRequestHandler, fp: BufferedReader, offset: int, count: int
+) -> None:
+    handler.wfile.flush()
+    if count <= 0:
+        return
+
+    conn = handler.connection
+    if type(conn) is socket:
+        sent = conn.sendfile(fp, offset=offset, count=count)
+        count_sent(handler, sent=sent)
+    else:
+        fp.seek(offset)
+        buf = memoryview(bytearray(min(_BUF_SIZE, count)))
+        while count > 0 and (n := fp.readinto(buf[: min(len(buf), count)])):
+            handler.wfile.write(buf[:n])
+            count -= n
+
+
+def _view(handler: BaseHTTPRequestHandler) -> _View:
+    query = parse_qs(urlsplit(handler.path).query)
+
+    def num(key: str) -> Optional[int]:
+        try:
+            val = int(query[key][-1])
+        except (KeyError, ValueError):
+            return None
+        else:
+            return val if val >= 0 else None
+
+    fmt = query.get("format", ("",))[-1]
+    limit = None if (lim := num("limit")) is None else max(1, lim)
+    view = _View(offset=num("offset") or 0, limit=limit, json=fmt == "json")
+    return view
+
+
+def _rows(listing: _Listing, view: _View) -> Sequence[_Fd]:
+    start = view.offset
+    stop = None if view.limit is None else start + view.limit
+    return listing.fds[start:stop]
+
+
+def _page(view: _View, offset: int) -> str:
+    query = {"offset": offset, "limit": view.limit}
+    return f"?{urlencode(query)}"
+
+
+def _html(
+    j2: Environment, listing: _Listing, view: _View, rows: Sequence[_Fd]
+) -> Iterator[str]:
+    total = len(listing.fds)
+    limit = view.limit
     env = {
-        "PATH": index.rel_path,
+        "PATH": listing.rel_path,
+        "PREV": (
+            _page(view, offset=max(0, view.offset - limit))
+            if limit is not None and view.offset
+            else None
+        ),
+        "NEXT": (
+            _page(view, offset=view.offset + limit)
+            if limit is not None and view.offset + limit < total
+            else None
+        ),
         "PATHS": (
             (
                 f.name,
@@ -122,20 +432,150 @@ def _index(j2: Environment, fd: tuple[_Fd, ...]) -> bytes:
                 si_prefixed(f.size, precision=2),
                 utc_to_local(f.mtime).replace(microsecond=0).strftime("%x %X %Z"),
             )
-            for f in fds
+            for f in rows
         ),
     }
-    html = render(j2, path=_INDEX, env=env)
-    return html.encode("UTF-8")
+    return generate(j2, path=_INDEX, env=env)
+
+
+def _json(listing: _Listing, view: _View, rows: Sequence[_Fd]) -> Iterator[str]:
+    path = dumps(str(listing.rel_path))
+    total = len(listing.fds)
+    yield f'{{"path": {path}, "offset": {view.offset}, "total": {total}, "entries": ['
+    for idx, f in enumerate(rows):
+        entry = {
+            "name": f.name,
+            "mime": f.mime,
+            "size": f.size,
+            "mtime": f.mtime.isoformat(),
+        }
+        if idx:
+            yield ", "
+        yield dumps(entry, check_circular=False)
+    yield "]}"
 
 
-def _send_index_headers(handler: BaseHTTPRequestHandler, index: bytes) -> None:
+def _batched(chunks: Iterator[str]) -> Iterator[bytes]:
+    acc: list[str] = []
+    size = 0
+    for chunk in chunks:
+        acc.append(chunk)
+        size += len(chunk)
+        if size >= _BATCH_SIZE:
+            yield "".join(acc).encode("UTF-8")
+            acc.clear()
+            size = 0
+    yield "".join(acc).encode("UTF-8")
+
+
+def _body(
+    j2: Environment,
+    listing: _Listing,
+    view: _View,
+    rows: Sequence[_Fd],
+    coding: Optional[str],
+) -> Iterator[bytes]:
+    text = (
+        _json(listing, view=view, rows=rows)
+        if view.json
+        else _html(j2, listing=listing, view=view, rows=rows)
+    )
+    chunks = _batched(text)
+    return gzip_chunks(chunks) if coding else chunks
+
+
+def _chunked(handler: BaseHTTPRequestHandler) -> bool:
+    return handler.protocol_version == handler.request_version == "HTTP/1.1"
+
+
+def _send_chunks(
+    handler: BaseHTTPRequestHandler,
+    chunks: Iterator[bytes],
+    tee: Optional[MutableSequence[bytes]],
+) -> None:
+    for chunk in chunks:
+        if chunk:
+            if tee is not None:
+                tee.append(chunk)
+            handler.wfile.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+    handler.wfile.write(b"0\r\n\r\n")
+
+
+def _send_index_headers(
+    handler: BaseHTTPRequestHandler,
+    mimetype: str,
+    tag: str,
+    coding: Optional[str],
+    length: Optional[int],
+) -> None:
     handler.send_response_only(HTTPStatus.OK)
-    handler.send_header("Content-Type", value="text/html")
-    handler.send_header("Content-Length", str(len(index)))
+    handler.send_header("Content-Type", value=mimetype)
+    handler.send_header("ETag", tag)
+    handler.send_header("Vary", _VARY)
+    if coding:
+        handler.send_header("Content-Encoding", coding)
+    if length is None:
+        handler.send_header("Transfer-Encoding", "chunked")
+    else:
+        handler.send_header("Content-Length", str(length))
     handler.end_headers()
 
 
+def _rendered(listing: _Listing, coding: Optional[str]) -> Optional[bytes]:
+    if (
+        (data := listing.rendered.get(coding)) is None
+        and coding
+        and (index := listing.rendered.get(None)) is not None
+    ):
+        data = listing.rendered[coding] = gzip_bytes(index)
+    return data
+
+
+def _send_index(
+    j2: Environment, handler: BaseHTTPRequestHandler, listing: _Listing, body: bool
+) -> None:
+    view = _view(handler)
+    accept = handler.headers.get("Accept-Encoding", "")
+    coding = GZIP if accepts_gzip(accept) else None
+    tag = variant_etag(listing.tag, coding=coding) if coding else listing.tag
+    mimetype = "application/json" if view.json else "text/html"
+    default = view == _DEFAULT_VIEW
+
+    if not_modified(handler.headers, tag=tag, mtime=None):
+        _send_not_modified(handler, tag=tag, mtime=None)
+
+    elif default and (data := _rendered(listing, coding=coding)) is not None:
+        _send_index_headers(
+            handler, mimetype=mimetype, tag=tag, coding=coding, length=len(data)
+        )
+        if body:
+            handler.wfile.write(data)
+
+    else:
+        rows = _rows(listing, view=view)
+        chunks = _body(j2, listing=listing, view=view, rows=rows, coding=coding)
+
+        if len(rows) > _STREAM_ROWS and _chunked(handler):
+            _send_index_headers(
+                handler, mimetype=mimetype, tag=tag, coding=coding, length=None
+            )
+            if body:
+                tee: Optional[list[bytes]] = [] if default else None
+                with suppress(ConnectionError):
+                    _send_chunks(handler, chunks=chunks, tee=tee)
+                    if tee is not None:
+                        listing.rendered[coding] = b"".join(tee)
+        else:
+            data = b"".join(chunks)
+            if default:
+                listing.rendered[coding] = data
+            _send_index_headers(
+                handler, mimetype=mimetype, tag=tag, coding=coding, length=len(data)
+            )
+            if body:
+                handler.wfile.write(data)
+
+
 def build_j2() -> Environment:
     j2 = build(_TEMPLATES)
     return j2
@@ -150,13 +590,11 @@ def head(
     fds = _seek(handler, prefix=prefix, root=root)
 
     if fds is None:
-        handler.send_response_only(HTTPStatus.NOT_FOUND)
-        handler.end_headers()
-    elif isinstance(fds, Sequence):
-        index = _index(j2, fd=fds)
-        _send_index_headers(handler, index=index)
+        _send_not_found(handler)
+    elif isinstance(fds, _Listing):
+        _send_index(j2, handler=handler, listing=fds, body=False)
     else:
-        _send_headers(handler, fd=fds)
+        _send_file(handler, fd=fds, body=False)
 
 
 def get(
@@ -168,13 +606,8 @@ def get(
     fd = _seek(handler, prefix=prefix, root=root)
 
     if fd is None:
-        handler.send_response_only(HTTPStatus.NOT_FOUND)
-        handler.end_headers()
-    elif isinstance(fd, Sequence):
-        index = _index(j2, fd=fd)
-        _send_index_headers(handler, index=index)
-        handler.wfile.write(index)
+        _send_not_found(handler)
+    elif isinstance(fd, _Listing):
+        _send_index(j2, handler=handler, listing=fd, body=True)
     else:
-        _send_headers(handler, fd=fd)
-        with fd.path.open("rb") as pp, suppress(ConnectionError):
-            copyfileobj(cast(Any, pp), handler.wfile)
+        _send_file(handler, fd=fd, body=True)
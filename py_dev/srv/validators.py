@@ -0,0 +1,59 @@
+from datetime import datetime
+from email.message import Message
+from email.utils import parsedate_to_datetime
+from hashlib import blake2b
+from time import time_ns
+from typing import Iterable, Iterator, Optional
+
+_WEAK = "W/"
+
+
+def etag(ino: int, size: int, mtime_ns: int) -> str:
+    tag = f'"{ino:x}-{size:x}-{mtime_ns:x}"'
+    return _WEAK + tag if time_ns() - mtime_ns < 10**9 else tag
+
+
+def weak_etag(parts: Iterable[str]) -> str:
+    hashed = blake2b(digest_size=16)
+    for part in parts:
+        hashed.update(part.encode())
+        hashed.update(b"\0")
+    return f'{_WEAK}"{hashed.hexdigest()}"'
+
+
+def variant_etag(tag: str, coding: str) -> str:
+    return f'{tag[:-1]}-{coding}"'
+
+
+def _tags(header: str) -> Iterator[str]:
+    for tag in header.split(","):
+        if tag := tag.strip():
+            yield tag
+
+
+def _opaque(tag: str) -> str:
+    return tag[len(_WEAK) :] if tag.startswith(_WEAK) else tag
+
+
+def strong_match(header: str, tag: str) -> bool:
+    return not tag.startswith(_WEAK) and header.strip() == tag
+
+
+def not_modified(headers: Message, tag: str, mtime: Optional[datetime]) -> bool:
+    if (inm := headers.get("If-None-Match")) is not None:
+        opaque = _opaque(tag)
+        return any(t == "*" or _opaque(t) == opaque for t in _tags(inm))
+
+    elif mtime and (ims := headers.get("If-Modified-Since")):
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        else:
+            if not since.tzinfo:
+                return False
+            else:
+                return mtime.replace(microsecond=0) <= since
+
+    else:
+        return False
@@ -0,0 +1,30 @@
+from contextlib import contextmanager, suppress
+from os import close, devnull, dup, dup2
+from sys import stderr, stdout
+from typing import Iterator, Mapping
+
+
+def _flush() -> None:
+    for fp in (stdout, stderr):
+        try:
+            fp.flush()
+        except OSError:
+            with open(devnull, "wb") as null:
+                dup2(null.fileno(), fp.fileno())
+            with suppress(OSError):
+                fp.flush()
+
+
+@contextmanager
+def redirected(fds: Mapping[int, int]) -> Iterator[None]:
+    _flush()
+    saved = {dst: dup(dst) for dst in fds}
+    try:
+        for dst, src in fds.items():
+            dup2(src, dst)
+        yield None
+    finally:
+        _flush()
+        for dst, src in saved.items():
+            dup2(src, dst)
+            close(src)
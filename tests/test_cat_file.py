@@ -0,0 +1,46 @@
+from asyncio import run
+from os import chdir, environ, getcwd
+from subprocess import check_call
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from py_dev.git.ops import cat_file, cat_file_check
+
+_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@localhost",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@localhost",
+}
+
+
+class CatFile(TestCase):
+    def setUp(self) -> None:
+        self._cwd = getcwd()
+        self._tmp = TemporaryDirectory()
+        chdir(self._tmp.name)
+        env = {**environ, **_ENV}
+        check_call(("git", "init", "--quiet"), env=env)
+        with open("with space", "w") as fp:
+            fp.write("data\n")
+        check_call(("git", "add", "--", "with space"), env=env)
+        check_call(("git", "commit", "--quiet", "--message", "init"), env=env)
+
+    def tearDown(self) -> None:
+        chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_missing_with_spaces(self) -> None:
+        async def cont() -> None:
+            missing, found = await cat_file_check(
+                "HEAD:no such file", "HEAD:with space"
+            )
+            self.assertIsNone(missing)
+            assert found
+            self.assertEqual((found.type, found.size), ("blob", 5))
+
+            (obj,) = await cat_file("HEAD:with space")
+            assert obj
+            self.assertEqual(obj[1], b"data\n")
+
+        run(cont())